@@ -0,0 +1,122 @@
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+from . import metrics
+
+
+class TokenCache:
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+local_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+stats = Counter()
+
+
+def shared_key(key):
+    return f'auth_token:{key}'
+
+
+def get_cached_user(key):
+    value = local_cache.get(key)
+    if value is not None:
+        stats['local_hits'] += 1
+        return pickle.loads(value)
+    stats['local_misses'] += 1
+    if not settings.TOKEN_CACHE_SHARED:
+        return None
+    value = cache.get(shared_key(key))
+    if value is None:
+        stats['shared_misses'] += 1
+        return None
+    stats['shared_hits'] += 1
+    local_cache.set(key, value)
+    return pickle.loads(value)
+
+
+def cache_user(key, user):
+    value = pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+    local_cache.set(key, value)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.set(shared_key(key), value, settings.TOKEN_CACHE_SHARED_TTL)
+
+
+def invalidate(*keys):
+    for key in keys:
+        local_cache.delete(key)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.delete_many([shared_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = get_cached_user(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache_user(key, user)
+            return user, token
+        if not user.is_active:
+            invalidate(key)
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        return user, Token(key=key, user=user)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if not created:
+        invalidate(*Token.objects.filter(
+            user=instance).values_list('key', flat=True))
+
+
+@metrics.register_collector
+def collect_stats():
+    yield '# HELP foodgram_token_cache_total Обращения к кэшу токенов'
+    yield '# TYPE foodgram_token_cache_total counter'
+    for layer in ('local', 'shared'):
+        for result in ('hits', 'misses'):
+            yield (f'foodgram_token_cache_total{{layer="{layer}",'
+                   f'result="{result}"}} {stats[f"{layer}_{result}"]}')
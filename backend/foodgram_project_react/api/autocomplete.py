@@ -0,0 +1,82 @@
+import bisect
+from collections import namedtuple
+from itertools import chain, islice
+
+from recipes.models import Ingredient
+from .caching import get_model_version
+
+IngredientEntry = namedtuple(
+    'IngredientEntry', ('id', 'name', 'measurement_unit')
+)
+
+
+def get_trigrams(value):
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class IngredientIndex:
+    version = None
+
+    def __init__(self, entries):
+        self.entries = tuple(sorted(
+            entries,
+            key=lambda entry: (entry.name.lower(), entry.measurement_unit)
+        ))
+        self.keys = tuple(entry.name.lower() for entry in self.entries)
+        trigrams = {}
+        for position, key in enumerate(self.keys):
+            for trigram in get_trigrams(key):
+                trigrams.setdefault(trigram, []).append(position)
+        self.trigrams = {
+            trigram: tuple(positions)
+            for trigram, positions in trigrams.items()
+        }
+
+    def prefix_matches(self, query):
+        start = bisect.bisect_left(self.keys, query)
+        for position in range(start, len(self.keys)):
+            if not self.keys[position].startswith(query):
+                break
+            yield position
+
+    def substring_matches(self, query):
+        candidates = range(len(self.keys))
+        if len(query) >= 3:
+            candidates = min(
+                (self.trigrams.get(trigram, ())
+                 for trigram in get_trigrams(query)),
+                key=len
+            )
+        for position in candidates:
+            key = self.keys[position]
+            if query in key and not key.startswith(query):
+                yield position
+
+    def search(self, query, limit=None):
+        query = query.strip().lower()
+        if not query:
+            return list(self.entries[:limit])
+        positions = chain(
+            self.prefix_matches(query), self.substring_matches(query)
+        )
+        return [
+            self.entries[position] for position in islice(positions, limit)
+        ]
+
+
+_index = None
+
+
+def get_ingredient_index():
+    global _index
+    version = get_model_version(Ingredient)
+    index = _index
+    if index is None or index.version != version:
+        index = IngredientIndex(
+            IngredientEntry(*row) for row in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        index.version = version
+        _index = index
+    return index
@@ -0,0 +1,56 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Subscription, User
+
+
+def model_version_key(model):
+    return f'model_version:{model._meta.label_lower}'
+
+
+def get_version_timeout():
+    if settings.CACHE_SHARED:
+        return None
+    return settings.MODEL_VERSION_LOCAL_TTL
+
+
+def get_model_version(model):
+    key = model_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, get_version_timeout()):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_model_version(model):
+    cache.set(model_version_key(model), uuid.uuid4().hex,
+              get_version_timeout())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_reference_version(sender, **kwargs):
+    bump_model_version(sender)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_counted_version(sender, **kwargs):
+    bump_model_version(sender)
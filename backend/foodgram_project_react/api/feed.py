@@ -0,0 +1,198 @@
+import base64
+import heapq
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+
+from recipes.models import FeedEntry, FeedInbox, Recipe
+from users.models import Subscription, User, UserStats
+from .membership import SUBSCRIPTIONS
+
+
+def encode_cursor(pub_date, recipe_id):
+    value = f'{pub_date.isoformat()}|{recipe_id}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, recipe_id = value.split('|')
+        pub_date = parse_datetime(pub_date)
+        recipe_id = int(recipe_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, recipe_id
+
+
+def before_cursor(cursor, date_field='pub_date', id_field='id'):
+    if cursor is None:
+        return Q()
+    pub_date, recipe_id = cursor
+    return Q(**{f'{date_field}__lt': pub_date}) | Q(
+        **{date_field: pub_date, f'{id_field}__lt': recipe_id})
+
+
+def get_subscriptions_count(user):
+    count = UserStats.objects.filter(user=user).values_list(
+        'subscriptions_count', flat=True).first()
+    if count is None:
+        count = Subscription.objects.filter(subscriber=user).count()
+    return count
+
+
+def get_inbox(user):
+    return FeedInbox.objects.filter(user=user).first()
+
+
+def latest_by_author(author_ids, limit, cursor=None):
+    ranked = Recipe.objects.filter(
+        before_cursor(cursor), author_id__in=author_ids
+    ).annotate(author_rank=Window(
+        expression=RowNumber(),
+        partition_by=[F('author_id')],
+        order_by=[F('pub_date').desc(), F('id').desc()],
+    )).order_by().values('id', 'author_id', 'pub_date', 'author_rank')
+    sql, params = ranked.query.sql_with_params()
+    return Recipe.objects.raw(
+        f'SELECT id, author_id, pub_date FROM ({sql}) ranked '
+        'WHERE author_rank <= %s ORDER BY author_id, pub_date DESC, id DESC',
+        params + (limit, )
+    )
+
+
+def read_author_streams(author_ids, cursor, limit):
+    streams = defaultdict(list)
+    author_ids = sorted(author_ids)
+    batch_size = settings.FEED_AUTHOR_BATCH_SIZE
+    for start in range(0, len(author_ids), batch_size):
+        for recipe in latest_by_author(
+                author_ids[start:start + batch_size], limit, cursor):
+            streams[recipe.author_id].append((recipe.pub_date, recipe.id))
+    return streams.values()
+
+
+def read_fan_out(author_ids, cursor, limit):
+    merged = heapq.merge(*read_author_streams(author_ids, cursor, limit),
+                         reverse=True)
+    return list(islice(merged, limit))
+
+
+def read_inbox(inbox, cursor, limit):
+    entries = FeedEntry.objects.filter(
+        before_cursor(cursor, id_field='recipe_id'), user_id=inbox.user_id)
+    if inbox.horizon is not None:
+        entries = entries.filter(pub_date__gt=inbox.horizon)
+    return list(entries.order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id')[:limit])
+
+
+def get_feed_page(user, membership, cursor, limit):
+    items = []
+    inbox = get_inbox(user)
+    if inbox is not None:
+        items = read_inbox(inbox, cursor, limit + 1)
+    if len(items) <= limit:
+        items += read_fan_out(
+            membership.get(SUBSCRIPTIONS), items[-1] if items else cursor,
+            limit + 1 - len(items))
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*items[-1])
+    recipes = Recipe.objects.for_read().in_bulk(
+        [recipe_id for _, recipe_id in items])
+    page = [recipes[recipe_id] for _, recipe_id in items
+            if recipe_id in recipes]
+    return page, next_cursor
+
+
+def backfill_inbox(user, author_ids):
+    limit = settings.FEED_INBOX_BACKFILL
+    entries = []
+    horizon = None
+    for start in range(0, len(author_ids), settings.FEED_AUTHOR_BATCH_SIZE):
+        batch = author_ids[start:start + settings.FEED_AUTHOR_BATCH_SIZE]
+        streams = defaultdict(list)
+        for recipe in latest_by_author(batch, limit + 1):
+            streams[recipe.author_id].append(recipe)
+        for recipes in streams.values():
+            if len(recipes) > limit:
+                recipes = recipes[:limit]
+                if horizon is None or recipes[-1].pub_date > horizon:
+                    horizon = recipes[-1].pub_date
+            entries.extend(
+                FeedEntry(user=user, recipe_id=recipe.id,
+                          author_id=recipe.author_id,
+                          pub_date=recipe.pub_date)
+                for recipe in recipes
+            )
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=1000, ignore_conflicts=True)
+    _, created = FeedInbox.objects.get_or_create(
+        user=user, defaults={'horizon': horizon})
+    if not created and horizon is not None:
+        FeedInbox.objects.filter(
+            Q(horizon__isnull=True) | Q(horizon__lt=horizon), user=user
+        ).update(horizon=horizon)
+
+
+def drop_inbox(user_ids):
+    FeedEntry.objects.filter(user_id__in=user_ids).delete()
+    FeedInbox.objects.filter(user_id__in=user_ids).delete()
+
+
+def backfill_inboxes(user_ids=None):
+    subscribers = UserStats.objects.filter(
+        subscriptions_count__gte=settings.FEED_INBOX_THRESHOLD)
+    if user_ids is not None:
+        subscribers = subscribers.filter(user_id__in=user_ids)
+    subscriber_ids = list(subscribers.values_list('user_id', flat=True))
+    if user_ids is None:
+        drop_inbox(list(FeedInbox.objects.exclude(
+            user_id__in=subscribers.values('user_id')
+        ).values_list('user_id', flat=True)))
+    for user_id in subscriber_ids:
+        backfill_inbox(User(id=user_id), list(Subscription.objects.filter(
+            subscriber_id=user_id).values_list('author_id', flat=True)))
+    return len(subscriber_ids)
+
+
+def on_subscribe(user, author):
+    count = get_subscriptions_count(user)
+    if count < settings.FEED_INBOX_THRESHOLD:
+        return
+    if get_inbox(user) is None:
+        backfill_inbox(user, list(Subscription.objects.filter(
+            subscriber=user).values_list('author_id', flat=True)))
+    else:
+        backfill_inbox(user, [author.id])
+
+
+def on_unsubscribe(user, author):
+    count = get_subscriptions_count(user)
+    if count < settings.FEED_INBOX_THRESHOLD:
+        drop_inbox([user.id])
+    else:
+        FeedEntry.objects.filter(user=user, author=author).delete()
+
+
+def fan_out_recipe(recipe):
+    subscriber_ids = Subscription.objects.filter(
+        author_id=recipe.author_id,
+        subscriber__stats__subscriptions_count__gte=(
+            settings.FEED_INBOX_THRESHOLD),
+    ).values_list('subscriber_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe=recipe,
+                   author_id=recipe.author_id, pub_date=recipe.pub_date)
+         for user_id in subscriber_ids),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
@@ -1,12 +1,45 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 
-from recipes.models import Ingredient
+from recipes.models import Favorite, Recipe, RecipeTag, ShoppingCart, Tag
 
 
-class IngredientFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(field_name='name',
-                                     lookup_expr='icontains')
+class RecipeFilter(django_filters.FilterSet):
+    author = django_filters.NumberFilter(field_name='author_id')
+    tags = django_filters.ModelMultipleChoiceFilter(
+        field_name='tags__slug',
+        to_field_name='slug',
+        queryset=Tag.objects.all(),
+        method='filter_tags',
+    )
+    is_favorited = django_filters.NumberFilter(method='filter_is_favorited')
+    is_in_shopping_cart = django_filters.NumberFilter(
+        method='filter_is_in_shopping_cart'
+    )
 
     class Meta:
-        model = Ingredient
-        fields = ('name',)
+        model = Recipe
+        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.annotate(
+            has_tags=Exists(RecipeTag.objects.filter(
+                recipe=OuterRef('pk'), tag__in=value))
+        ).filter(has_tags=True)
+
+    def filter_user_relation(self, queryset, name, model, value):
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none() if value else queryset
+        return queryset.annotate(
+            **{name: Exists(model.objects.filter(
+                user=user, recipe=OuterRef('pk')))}
+        ).filter(**{name: bool(value)})
+
+    def filter_is_favorited(self, queryset, name, value):
+        return self.filter_user_relation(queryset, name, Favorite, value)
+
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        return self.filter_user_relation(queryset, name, ShoppingCart, value)
@@ -0,0 +1,129 @@
+import base64
+import binascii
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, features
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Recipe
+from recipes.storage import recipe_image_storage
+
+logger = logging.getLogger(__name__)
+
+DECODE_CHUNK_SIZE = 64 * 1024
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails'
+)
+
+
+def sniff_format(head):
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def decode_base64_image(data):
+    header, _, payload = data.partition(';base64,')
+    if not payload or not header.startswith('data:image/'):
+        raise ValidationError('Картинка должна быть передана в base64')
+    if len(payload) // 4 * 3 > settings.RECIPE_IMAGE_MAX_SIZE:
+        raise ValidationError('Картинка слишком большая')
+    output = tempfile.SpooledTemporaryFile(max_size=DECODE_CHUNK_SIZE * 16)
+    ext = None
+    for start in range(0, len(payload), DECODE_CHUNK_SIZE):
+        try:
+            chunk = base64.b64decode(
+                payload[start:start + DECODE_CHUNK_SIZE], validate=True
+            )
+        except binascii.Error:
+            output.close()
+            raise ValidationError('Некорректная строка base64')
+        if ext is None:
+            ext = sniff_format(chunk)
+            if ext is None:
+                output.close()
+                raise ValidationError('Неподдерживаемый формат картинки')
+        output.write(chunk)
+    output.seek(0)
+    return File(output, name=f'temp.{ext}')
+
+
+def get_thumbnail_format():
+    if settings.THUMBNAIL_FORMAT == 'WEBP' and features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def get_thumbnail_name(name, width):
+    _, ext = get_thumbnail_format()
+    stem = os.path.splitext(name)[0]
+    return f'thumbs/{stem}_{width}.{ext}'
+
+
+def make_thumbnails(name):
+    image_format, _ = get_thumbnail_format()
+    names = {
+        width: get_thumbnail_name(name, width)
+        for width in settings.THUMBNAIL_WIDTHS
+    }
+    if all(map(recipe_image_storage.exists, names.values())):
+        return
+    with recipe_image_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    for width in settings.THUMBNAIL_WIDTHS:
+        thumbnail = image.copy()
+        if thumbnail.width > width:
+            thumbnail.thumbnail((width, thumbnail.height))
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, image_format, quality=80)
+        if not recipe_image_storage.exists(names[width]):
+            recipe_image_storage.save_derivative(
+                names[width], ContentFile(buffer.getvalue()))
+
+
+def run_thumbnails(name):
+    try:
+        make_thumbnails(name)
+        Recipe.objects.filter(image=name).update(has_thumbnails=True)
+    except Exception:
+        logger.exception('Не удалось создать превью для %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(name):
+    transaction.on_commit(lambda: executor.submit(run_thumbnails, name))
+
+
+def get_thumbnail_url(recipe, request=None):
+    if not recipe.image:
+        return None
+    url = recipe.image.url
+    if recipe.has_thumbnails:
+        url = recipe_image_storage.url(get_thumbnail_name(
+            recipe.image.name, settings.THUMBNAIL_WIDTHS[0]))
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
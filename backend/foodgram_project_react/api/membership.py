@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+SUBSCRIPTIONS = 'subscriptions'
+
+SOURCES = {
+    FAVORITES: (Favorite, 'user', 'recipe_id'),
+    SHOPPING_CART: (ShoppingCart, 'user', 'recipe_id'),
+    SUBSCRIPTIONS: (Subscription, 'subscriber', 'author_id'),
+}
+
+
+def cache_key(kind, user_id):
+    return f'membership:{kind}:{user_id}'
+
+
+def invalidate(user, *kinds):
+    cache.delete_many([cache_key(kind, user.id) for kind in kinds])
+
+
+class UserMembership:
+    def __init__(self, user):
+        self.user = user
+        self._sets = {}
+
+    def _load(self, kind):
+        if self.user is None or self.user.is_anonymous:
+            return frozenset()
+        timeout = settings.MEMBERSHIP_CACHE_TIMEOUT
+        key = cache_key(kind, self.user.id)
+        if timeout:
+            ids = cache.get(key)
+            if ids is not None:
+                return frozenset(ids)
+        model, user_field, id_field = SOURCES[kind]
+        ids = tuple(model.objects.filter(
+            **{user_field: self.user}
+        ).exclude(**{id_field: None}).values_list(id_field, flat=True))
+        if timeout:
+            cache.set(key, ids, timeout)
+        return frozenset(ids)
+
+    def get(self, kind):
+        if kind not in self._sets:
+            self._sets[kind] = self._load(kind)
+        return self._sets[kind]
+
+    def is_favorited(self, recipe_id):
+        return recipe_id in self.get(FAVORITES)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return recipe_id in self.get(SHOPPING_CART)
+
+    def is_subscribed(self, author_id):
+        return author_id in self.get(SUBSCRIPTIONS)
+
+
+def get_membership(request):
+    if request is None:
+        return UserMembership(None)
+    membership = getattr(request, '_membership', None)
+    if membership is None:
+        membership = UserMembership(request.user)
+        request._membership = membership
+    return membership
@@ -0,0 +1,191 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+HISTOGRAMS = (
+    ('request_duration_seconds', 'total', DURATION_BUCKETS,
+     'Время обработки запроса'),
+    ('db_duration_seconds', 'db', DURATION_BUCKETS,
+     'Время выполнения SQL-запросов'),
+    ('serialize_duration_seconds', 'serialize', DURATION_BUCKETS,
+     'Время сериализации ответа'),
+    ('db_queries', 'queries', QUERY_BUCKETS,
+     'Количество SQL-запросов'),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.endpoint = None
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.total = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+_lock = threading.Lock()
+_histograms = {}
+_collectors = []
+
+
+def register_collector(collector):
+    _collectors.append(collector)
+    return collector
+
+
+def observe(metrics):
+    with _lock:
+        for name, attr, buckets, _ in HISTOGRAMS:
+            histogram = _histograms.get((name, metrics.endpoint))
+            if histogram is None:
+                histogram = _histograms[(name, metrics.endpoint)] = (
+                    Histogram(buckets))
+            histogram.observe(getattr(metrics, attr))
+
+
+def render_histograms():
+    specs = {
+        name: (buckets, help_text)
+        for name, _, buckets, help_text in HISTOGRAMS
+    }
+    with _lock:
+        items = sorted(
+            (key, list(histogram.counts), histogram.sum)
+            for key, histogram in _histograms.items()
+        )
+    described = set()
+    for (name, endpoint), counts, total in items:
+        metric = f'foodgram_{name}'
+        buckets, help_text = specs[name]
+        if name not in described:
+            described.add(name)
+            yield f'# HELP {metric} {help_text}'
+            yield f'# TYPE {metric} histogram'
+        cumulative = 0
+        for bound, count in zip(buckets + ('+Inf', ), counts):
+            cumulative += count
+            yield (f'{metric}_bucket{{endpoint="{endpoint}",le="{bound}"}} '
+                   f'{cumulative}')
+        yield f'{metric}_sum{{endpoint="{endpoint}"}} {total}'
+        yield f'{metric}_count{{endpoint="{endpoint}"}} {cumulative}'
+
+
+def metrics_view(request):
+    lines = list(render_histograms())
+    for collector in _collectors:
+        lines.extend(collector())
+    return HttpResponse(
+        '\n'.join(lines) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def get_metrics(request):
+    return getattr(request, '_metrics', None)
+
+
+def set_endpoint(request, endpoint):
+    metrics = get_metrics(request)
+    if metrics is not None:
+        metrics.endpoint = endpoint
+
+
+def timed(request, attr, func):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics = get_metrics(request)
+            if metrics is not None:
+                setattr(metrics, attr, getattr(metrics, attr) +
+                        time.perf_counter() - started)
+    return wrapper
+
+
+def resolve_endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'cls', match.func)
+    name = getattr(view, '__name__', match.view_name)
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        return f'{name}.{actions.get(request.method.lower(), "unknown")}'
+    return name
+
+
+def check_budget(metrics):
+    budget = settings.QUERY_BUDGETS.get(metrics.endpoint)
+    if budget is None or metrics.queries <= budget:
+        return
+    message = (f'{metrics.endpoint}: {metrics.queries} SQL-запросов '
+               f'при бюджете {budget}')
+    if settings.QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def server_timing(metrics):
+    return ', '.join((
+        f'db;dur={metrics.db * 1000:.1f};desc="{metrics.queries} queries"',
+        f'serialize;dur={metrics.serialize * 1000:.1f}',
+        f'total;dur={metrics.total * 1000:.1f}',
+    ))
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request._metrics = RequestMetrics()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.record_query))
+            response = self.get_response(request)
+        metrics.total = time.perf_counter() - started
+        if metrics.endpoint is None:
+            metrics.endpoint = resolve_endpoint(request)
+        observe(metrics)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics)
+        check_budget(metrics)
+        return response
@@ -1,7 +1,30 @@
-from rest_framework import mixins, viewsets, permissions
+import hashlib
 
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.renderers import JSONRenderer
 
-class CreateRetriveViewSet(mixins.CreateModelMixin,
+from . import metrics
+from .caching import get_model_version
+
+
+class MetricsMixin:
+    def initial(self, request, *args, **kwargs):
+        metrics.set_endpoint(
+            request._request, f'{type(self).__name__}.{self.action}')
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        serializer.to_representation = metrics.timed(
+            self.request, 'serialize', serializer.to_representation)
+        return serializer
+
+
+class CreateRetriveViewSet(MetricsMixin,
+                           mixins.CreateModelMixin,
                            mixins.RetrieveModelMixin,
                            viewsets.GenericViewSet):
     permission_classes = (
@@ -10,16 +33,60 @@ class CreateRetriveViewSet(mixins.CreateModelMixin,
     lookup_field = 'id'
 
 
-class CreateDeleteViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin,
-                          viewsets.GenericViewSet):
+class CreateDeleteViewSet(MetricsMixin, mixins.CreateModelMixin,
+                          mixins.DestroyModelMixin, viewsets.GenericViewSet):
     permission_classes = (
         permissions.IsAuthenticated,
     )
 
 
-class ListRetriveViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
-                         viewsets.GenericViewSet):
+class ListRetriveViewSet(MetricsMixin, mixins.ListModelMixin,
+                         mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
     )
     lookup_field = 'id'
+
+
+class CachedResponseMixin:
+    cache_models = ()
+
+    def get_response_cache_key(self, request):
+        versions = ':'.join(
+            get_model_version(model) for model in self.cache_models
+        )
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f'response:{self.basename}:{self.action}:{path}:{versions}'
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = JSONRenderer().render(response.data)
+            etag = '"{0}"'.format(hashlib.sha1(content).hexdigest())
+            cached = (content, etag)
+            cache.set(key, cached, settings.REFERENCE_CACHE_TIMEOUT)
+        content, etag = cached
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in (tag.strip() for tag in if_none_match.split(',')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            f'public, max-age={settings.REFERENCE_CACHE_MAX_AGE}')
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, **kwargs)
+
+
+class CachedListRetriveViewSet(CachedResponseMixin, ListRetriveViewSet):
+    pass
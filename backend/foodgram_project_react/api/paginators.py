@@ -1,7 +1,190 @@
+import datetime
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .caching import get_model_version
+
+
+def estimate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+def get_query_versions(queryset, sql):
+    quote_name = connections[queryset.db].ops.quote_name
+    return ':'.join(
+        get_model_version(model) for model in apps.get_models()
+        if quote_name(model._meta.db_table) in sql
+    )
+
+
+def get_cached_count(queryset):
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    key = 'pagination_count:{0}:{1}'.format(
+        hashlib.md5(sql.encode()).hexdigest(),
+        hashlib.md5(get_query_versions(queryset, sql).encode()).hexdigest(),
+    )
+    count = cache.get(key)
+    if count is None:
+        count = estimate_count(queryset)
+        if count is None:
+            count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return get_cached_count(self.object_list)
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+def keyset_filter(ordering, values):
+    condition = None
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**equal, **{f'{name}__{lookup}': value})
+        condition = step if condition is None else condition | step
+        equal[name] = value
+    first = ordering[0].lstrip('-')
+    bound = 'lte' if ordering[0].startswith('-') else 'gte'
+    return Q(**{f'{first}__{bound}': values[0]}) & condition
+
+
+def to_position_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+class KeysetPagination(pagination.CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-pub_date', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        self.count = None
+        if settings.PAGINATION_LEGACY_COUNT:
+            self.count = get_cached_count(queryset)
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = False
+        values = None
+        if self.cursor is not None:
+            reverse = self.cursor.reverse
+            values = self.decode_position(self.cursor.position)
+        ordering = self.ordering
+        if reverse:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        if not self.page:
+            self.has_next = self.has_previous = False
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_position(self, instance):
+        return json.dumps([
+            to_position_value(getattr(instance, field.lstrip('-')))
+            for field in self.ordering
+        ])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(pagination.Cursor(
+            offset=0, reverse=False, position=self.get_position(self.page[-1])
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(pagination.Cursor(
+            offset=0, reverse=True, position=self.get_position(self.page[0])
+        ))
+
+    def get_paginated_response(self, data):
+        fields = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.count is not None:
+            fields.insert(0, ('count', self.count))
+        return Response(OrderedDict(fields))
 
 
 class StandardResultsSetPagination(pagination.PageNumberPagination):
     page_size = 6
-    page_size_query_param = 'page_size'
+    page_size_query_param = 'limit'
     max_page_size = 100
+    django_paginator_class = CachedCountPaginator
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import django
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_QUEUE)
+_executor = None
+_pid = None
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите запрос позже'
+    default_code = 'hashing_unavailable'
+    wait = settings.PASSWORD_HASHING_RETRY_AFTER
+
+
+def get_executor():
+    global _executor, _pid
+    with _lock:
+        if _executor is None or _pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+            _pid = os.getpid()
+        return _executor
+
+
+def release_slot(future):
+    _slots.release()
+
+
+def run(func, *args):
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return func(*args)
+    if not _slots.acquire(blocking=False):
+        raise HashingUnavailable()
+    try:
+        future = get_executor().submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(release_slot)
+    try:
+        return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise HashingUnavailable()
@@ -1,14 +1,18 @@
-import base64
-
 from django.contrib.auth.hashers import make_password
-from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator, ValidationError
 
-from .utilits import tag_operator, ingredient_operator
+from . import passwords
+from .feed import fan_out_recipe
+from .images import (decode_base64_image, get_thumbnail_url,
+                     schedule_thumbnails)
+from .membership import get_membership
+from .utilits import (get_recipes_limit, set_recipe_ingredients,
+                      set_recipe_tags)
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            RecipeTag, ShoppingCart, Tag)
-from users.models import Subscription, User
+                            ShoppingCart, Tag)
+from users.models import Subscription, User, UserStats
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -28,6 +32,13 @@ class TagSerializer(serializers.ModelSerializer):
         )
 
 
+class Base64ImageField(serializers.ImageField):
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = decode_base64_image(data)
+        return super().to_internal_value(data)
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
@@ -47,7 +58,7 @@ class IngredientsListRetriveSerializer(serializers.ModelSerializer):
 
 
 class IngredientAmountSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         model = RecipeIngredient
@@ -77,11 +88,8 @@ class UserRetrieveSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-            author=request.user, subscriber=obj).exists()
+        membership = get_membership(self.context.get('request'))
+        return membership.is_subscribed(obj.id)
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
@@ -95,6 +103,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_thumb = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -107,6 +116,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_thumb',
             'text',
             'cooking_time'
         )
@@ -114,19 +124,37 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'id',
         )
 
+    def get_image_thumb(self, obj):
+        return get_thumbnail_url(obj, self.context.get('request'))
+
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            user=request.user, recipe=obj).exists()
+        membership = get_membership(self.context.get('request'))
+        return membership.is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            user=request.user, recipe=obj).exists()
+        membership = get_membership(self.context.get('request'))
+        return membership.is_in_shopping_cart(obj.id)
+
+
+class RecipeCoverageSerializer(RecipeReadSerializer):
+    matched_count = serializers.ReadOnlyField()
+    missing_count = serializers.ReadOnlyField()
+    missing_ingredients = serializers.SerializerMethodField()
+
+    class Meta(RecipeReadSerializer.Meta):
+        fields = RecipeReadSerializer.Meta.fields + (
+            'matched_count',
+            'missing_count',
+            'missing_ingredients',
+        )
+
+    def get_missing_ingredients(self, obj):
+        available = self.context.get('ingredient_ids', ())
+        missing = [
+            row for row in obj.recipe_to_ingredient.all()
+            if row.ingredient_id not in available
+        ]
+        return IngredientSerializer(missing, many=True).data
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -136,13 +164,12 @@ class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientAmountSerializer(
         many=True,
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
         required=True,
         write_only=True,
-        many=True,
-        queryset=Tag.objects.all(),
     )
-    image = serializers.ImageField(
+    image = Base64ImageField(
         required=True,
     )
     name = serializers.CharField(
@@ -172,74 +199,75 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def validate_ingredients(self, value):
+        amounts = {}
         for ingredient in value:
-            count = 0
-            for same_ing in value:
-                if same_ing == ingredient:
-                    count += 1
-            if count > 1:
+            if ingredient['id'] in amounts:
                 raise ValidationError('дубликат ингредиента')
-        return value
-
+            amounts[ingredient['id']] = ingredient['amount']
+        missing = amounts.keys() - set(Ingredient.objects.filter(
+            id__in=amounts).values_list('id', flat=True))
+        if missing:
+            raise ValidationError(
+                f'ингредиенты не найдены: {sorted(missing)}')
+        return amounts
+
+    def validate_tags(self, value):
+        tags = set(value)
+        if len(tags) != len(value):
+            raise ValidationError('дубликат тега')
+        missing = tags - set(Tag.objects.filter(
+            id__in=tags).values_list('id', flat=True))
+        if missing:
+            raise ValidationError(f'теги не найдены: {sorted(missing)}')
+        return tags
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
-        recipe.save()
-        tags_data = []
-        ingredients_data = []
-        ingredient_create = []
-        tag_operator(tags, RecipeTag, tags_data, recipe)
-        ingredient_operator(
-            ingredients, RecipeIngredient,
-            recipe, ingredients_data,
-            ingredient_create, ValidationError
-        )
-        RecipeIngredient.objects.bulk_create(ingredient_create)
-        recipe.tags.add(*tags_data)
-        recipe.ingredients.add(*ingredients_data)
+        UserStats.change_counter(recipe.author_id, 'recipes_count', 1)
+        fan_out_recipe(recipe)
+        set_recipe_tags(recipe, tags, created=True)
+        set_recipe_ingredients(recipe, ingredients, created=True)
+        schedule_thumbnails(recipe.image.name)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        if 'image' in validated_data:
+            instance.has_thumbnails = False
         recipe = super().update(instance, validated_data)
-        tags_data = []
-        ingredients_data = []
-        ingredient_create = []
-        tag_operator(tags, RecipeTag, tags_data, recipe)
-        ingredient_operator(
-            ingredients, RecipeIngredient,
-            recipe, ingredients_data,
-            ingredient_create, ValidationError
-        )
-        RecipeIngredient.objects.bulk_create(ingredient_create)
-        recipe.tags.add(*tags_data)
-        recipe.ingredients.add(*ingredients_data)
+        if tags is not None:
+            set_recipe_tags(recipe, tags)
+        if ingredients is not None:
+            set_recipe_ingredients(recipe, ingredients)
+        if 'image' in validated_data:
+            schedule_thumbnails(recipe.image.name)
         return recipe
 
-    def to_internal_value(self, data):
-        imgstr = data.get('image')
-        format, imgstr = imgstr.split(';base64,')
-        ext = format.split('/')[-1]
-        image = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        data['image'] = image
-        return super(RecipeSerializer, self).to_internal_value(data)
-
     def to_representation(self, instance):
         return RecipeReadSerializer(instance, context=self.context).data
 
 
 class RecipeToRepresentationSerializer(serializers.ModelSerializer):
+    image_thumb = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_thumb',
             'cooking_time'
         )
 
+    def get_image_thumb(self, obj):
+        return get_thumbnail_url(obj, self.context.get('request'))
+
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(
@@ -320,13 +348,13 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        validated_data['password'] = make_password(
-                                    validated_data.get('password'))
+        validated_data['password'] = passwords.run(
+            make_password, validated_data.get('password'))
         return User.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
-        validated_data['password'] = make_password(
-                                    validated_data.get('password'))
+        validated_data['password'] = passwords.run(
+            make_password, validated_data.get('password'))
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
@@ -362,7 +390,7 @@ class RecipeToUser(serializers.ModelSerializer):
 
 class UserSubscriptionSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
-    recipes = RecipeToUser(many=True)
+    recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -387,14 +415,27 @@ class UserSubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-            author=request.user, subscriber=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        membership = get_membership(self.context.get('request'))
+        return membership.is_subscribed(obj.id)
+
+    def get_recipes(self, obj):
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = obj.recipes.order_by('-pub_date', '-id')
+            limit = get_recipes_limit(self.context.get('request'))
+            if limit is not None:
+                recipes = recipes[:limit]
+        return RecipeToUser(recipes, many=True, context=self.context).data
 
     def get_recipes_count(self, obj):
-        return obj.recipes.all().count()
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        try:
+            return obj.stats.recipes_count
+        except UserStats.DoesNotExist:
+            return obj.recipes.count()
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
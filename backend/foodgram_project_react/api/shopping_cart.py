@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db.models import Sum
+from PIL import Image, ImageDraw, ImageFont
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from recipes.models import RecipeIngredient, ShoppingCart
+
+PDF_PAGE_SIZE = (1240, 1754)
+PDF_RESOLUTION = 150
+PDF_MARGIN = 100
+PDF_FONT_SIZE = 28
+PDF_LINE_HEIGHT = 44
+
+
+class PdfFontUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Выгрузка в PDF недоступна: не найден шрифт'
+    default_code = 'pdf_font_unavailable'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def aggregate_shopping_cart(user):
+    return RecipeIngredient.objects.filter(
+        recipe__recipe_shoppingcart__user=user,
+        ingredient__isnull=False,
+    ).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+    ).annotate(
+        amount=Sum('amount')
+    ).order_by(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+    )
+
+
+def render_txt(rows):
+    for name, measurement_unit, amount in rows:
+        yield f'{name} ({measurement_unit}) - {amount}\n'
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_json(rows):
+    yield '['
+    separator = ''
+    for name, measurement_unit, amount in rows:
+        item = json.dumps({
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount,
+        }, ensure_ascii=False)
+        yield f'{separator}{item}'
+        separator = ','
+    yield ']'
+
+
+RENDERERS = {
+    'txt': (render_txt, 'text/plain; charset=UTF-8'),
+    'csv': (render_csv, 'text/csv; charset=UTF-8'),
+    'json': (render_json, 'application/json; charset=UTF-8'),
+}
+
+
+def cart_version_key(user_id):
+    return f'shopping_cart_version:{user_id}'
+
+
+def get_cart_version(user):
+    key = cart_version_key(user.id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, None)
+    return version
+
+
+def bump_cart_version(*user_ids):
+    cache.delete_many([cart_version_key(user_id) for user_id in user_ids])
+
+
+def bump_recipe_carts(recipe):
+    bump_cart_version(*ShoppingCart.objects.filter(
+        recipe=recipe
+    ).values_list('user_id', flat=True))
+
+
+def load_font(size):
+    try:
+        return ImageFont.truetype(settings.SHOPPING_CART_PDF_FONT, size)
+    except OSError:
+        raise PdfFontUnavailable()
+
+
+@checks.register()
+def check_pdf_font(app_configs, **kwargs):
+    try:
+        ImageFont.truetype(settings.SHOPPING_CART_PDF_FONT, PDF_FONT_SIZE)
+    except OSError:
+        return [checks.Warning(
+            f'Не удалось загрузить шрифт {settings.SHOPPING_CART_PDF_FONT}',
+            hint='Установите шрифт с кириллицей или укажите путь к нему '
+                 'в SHOPPING_CART_PDF_FONT',
+            id='api.W001',
+        )]
+    return []
+
+
+def render_pdf(rows):
+    font = load_font(PDF_FONT_SIZE)
+    lines = [(load_font(PDF_FONT_SIZE * 3 // 2), 'Список покупок'), ]
+    lines += [
+        (font, f'{name} ({measurement_unit}) - {amount}')
+        for name, measurement_unit, amount in rows
+    ]
+    per_page = (PDF_PAGE_SIZE[1] - 2 * PDF_MARGIN) // PDF_LINE_HEIGHT
+    pages = []
+    for start in range(0, len(lines), per_page):
+        page = Image.new('L', PDF_PAGE_SIZE, 255)
+        draw = ImageDraw.Draw(page)
+        y = PDF_MARGIN
+        for line_font, text in lines[start:start + per_page]:
+            draw.text((PDF_MARGIN, y), text, font=line_font, fill=0)
+            y += PDF_LINE_HEIGHT
+        pages.append(page)
+    buffer = io.BytesIO()
+    pages[0].save(
+        buffer, 'PDF', save_all=True, append_images=pages[1:],
+        resolution=PDF_RESOLUTION
+    )
+    return buffer.getvalue()
+
+
+def get_shopping_cart_pdf(user):
+    key = f'shopping_cart_pdf:{user.id}:{get_cart_version(user)}'
+    content = cache.get(key)
+    if content is None:
+        rows = list(aggregate_shopping_cart(user))
+        if not rows:
+            return None
+        content = render_pdf(rows)
+        cache.set(key, content, settings.SHOPPING_CART_PDF_CACHE_TIMEOUT)
+    return content
@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.models import (Favorite, FeedInbox, Ingredient, Recipe,
+                            RecipeIngredient, RecipeTag, ShoppingCart, Tag)
+from users.models import Subscription, User
+
+RECIPES_URL = '/api/recipes/'
+FEED_URL = '/api/recipes/feed/'
+
+
+class RecipeListQueriesTest(APITestCase):
+    queries = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass')
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                password='pass',
+            )
+            for number in range(3)
+        ]
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color='#000000', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        ]
+        for number in range(12):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+            )
+            RecipeTag.objects.bulk_create(
+                RecipeTag(recipe=recipe, tag=tag) for tag in tags[:2])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=100)
+                for ingredient in ingredients[:3]
+            )
+            if number % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if number % 3:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(author=authors[0], subscriber=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_list_queries(self):
+        self.client.get(RECIPES_URL, {'limit': 1})
+        for limit in (2, 10):
+            with self.assertNumQueries(self.queries):
+                response = self.client.get(RECIPES_URL, {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_list_queries(self):
+        self.assert_list_queries()
+
+    def test_authenticated_list_queries(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assert_list_queries()
+
+
+@override_settings(FEED_INBOX_THRESHOLD=2, FEED_INBOX_BACKFILL=1)
+class FeedInboxTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass')
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                password='pass',
+            )
+            for number in range(2)
+        ]
+        now = timezone.now()
+        cls.expected = []
+        for author, days in ((0, 1), (0, 2), (0, 3), (1, 5), (1, 10)):
+            recipe = Recipe.objects.create(
+                author=cls.authors[author],
+                name=f'Рецепт {days}',
+                text='Описание',
+                cooking_time=10,
+            )
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=days))
+            cls.expected.append(recipe.id)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        for author in self.authors:
+            response = self.client.post(f'/api/users/{author.id}/subscribe/')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_feed_includes_recipes_beyond_backfill(self):
+        self.assertIsNotNone(FeedInbox.objects.get(user=self.user).horizon)
+        response = self.client.get(FEED_URL, {'limit': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            self.expected)
+
+    def test_feed_pages_include_recipes_beyond_backfill(self):
+        seen = []
+        response = self.client.get(FEED_URL, {'limit': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [recipe['id'] for recipe in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, self.expected)
+
+
+class RecipeSearchTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        response = self.client.get(RECIPES_URL, {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_created_and_edited_recipes_are_searchable(self):
+        recipe = Recipe.objects.create(
+            author=self.author,
+            name='Борщ',
+            text='Свёкла и капуста',
+            cooking_time=60,
+        )
+        Recipe.objects.create(
+            author=self.author,
+            name='Блины',
+            text='Мука и молоко',
+            cooking_time=30,
+        )
+        self.assertEqual(self.search('борщ'), [recipe.id])
+        recipe.name = 'Щи'
+        recipe.text = 'Капуста'
+        recipe.save()
+        self.assertEqual(self.search('борщ'), [])
+        self.assertEqual(self.search('щи'), [recipe.id])
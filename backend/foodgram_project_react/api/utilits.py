@@ -1,19 +1,65 @@
-def tag_operator(objs, some_model, some_data_storage, model_attr):
-    for obj in objs:
-        some_model.objects.create(recipe=model_attr, tag=obj)
-        some_data_storage.append(obj)
-
-
-def ingredient_operator(
-    objs, some_model, model_attr, some_data_storage, another_data_storage1, err
-):
-    for ingredient in objs:
-        ing = ingredient.get('id')
-        amount = ingredient.get('amount')
-        new_recing = some_model(
-            recipe=model_attr,
-            ingredient=ing,
-            amount=amount
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from recipes.models import Recipe, RecipeIngredient, RecipeTag
+
+
+def set_recipe_tags(recipe, tag_ids, created=False):
+    new = set(tag_ids)
+    current = set()
+    if not created:
+        current = set(RecipeTag.objects.filter(
+            recipe=recipe).values_list('tag_id', flat=True))
+        if current - new:
+            RecipeTag.objects.filter(
+                recipe=recipe, tag_id__in=current - new).delete()
+    RecipeTag.objects.bulk_create(
+        RecipeTag(recipe=recipe, tag_id=tag_id) for tag_id in new - current
+    )
+
+
+def set_recipe_ingredients(recipe, amounts, created=False):
+    current = {}
+    if not created:
+        current = {
+            link.ingredient_id: link
+            for link in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed).delete()
+        changed = []
+        for ingredient_id, link in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and link.amount != amount:
+                link.amount = amount
+                changed.append(link)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe, ingredient_id=ingredient_id, amount=amount
         )
-        another_data_storage1.append(new_recing)
-        some_data_storage.append(ing)
+        for ingredient_id, amount in amounts.items()
+        if ingredient_id not in current
+    )
+
+
+def get_recipes_limit(request):
+    if request is None:
+        return None
+    try:
+        limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return limit if limit > 0 else None
+
+
+def latest_recipes_prefetch(limit):
+    queryset = Recipe.objects.order_by('-pub_date', '-id')
+    if limit is not None:
+        latest = Recipe.objects.filter(
+            author=OuterRef('author')
+        ).order_by('-pub_date', '-id').values('pk')[:limit]
+        queryset = queryset.filter(pk__in=Subquery(latest))
+    return Prefetch('recipes', queryset=queryset, to_attr='latest_recipes')
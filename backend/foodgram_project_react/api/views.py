@@ -1,53 +1,175 @@
+from itertools import chain
+
+from django.conf import settings
 from django.contrib.auth.hashers import check_password
-from django.db import IntegrityError
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import (filters, permissions, status,
-                            viewsets)
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
-from users.models import Subscription, User
-from .filters import IngredientFilter
-from .mixins import (CreateRetriveViewSet, CreateDeleteViewSet,
-                     ListRetriveViewSet)
+from users.models import Subscription, User, UserStats
+from . import feed, membership, passwords
+from .autocomplete import get_ingredient_index
+from .filters import RecipeFilter
+from .mixins import (CachedListRetriveViewSet, CreateRetriveViewSet,
+                     CreateDeleteViewSet, MetricsMixin)
 from .paginators import StandardResultsSetPagination
 from .permissions import IsAuthorStaffOrReadOnly
 from .serializers import (FavoritesSerializer,
-                          IngredientsListRetriveSerializer, RecipeSerializer,
+                          IngredientsListRetriveSerializer,
+                          RecipeCoverageSerializer,
+                          RecipeReadSerializer, RecipeSerializer,
                           RegistrationSerializer, ShoppingCartSerializer,
                           SubscriptionSerializer, TagSerializer,
                           UserRetrieveSerializer, UserSubscriptionSerializer,
                           RecipeToRepresentationSerializer)
+from .shopping_cart import (RENDERERS, aggregate_shopping_cart,
+                            bump_cart_version, bump_recipe_carts,
+                            get_shopping_cart_pdf)
+from .utilits import get_recipes_limit, latest_recipes_prefetch
+
 
+RECIPE_ORDERINGS = {
+    'newest': ('-pub_date', '-id'),
+    'popular': ('-favorites_count', '-id'),
+    'trending': ('-trending_score', '-id'),
+    'relevance': ('-search_rank', '-pub_date', '-id'),
+}
+COVERAGE_ORDERING = ('-matched_count', 'missing_count', '-pub_date', '-id')
+RECIPE_ACTION_SERIALIZERS = {
+    'subscriptions_feed': RecipeReadSerializer,
+    'similar': RecipeToRepresentationSerializer,
+    'by_ingredients': RecipeCoverageSerializer,
+}
 
-class TagListRetriveViewSet(ListRetriveViewSet):
+
+class TagListRetriveViewSet(CachedListRetriveViewSet):
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
+    cache_models = (Tag, )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(MetricsMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorStaffOrReadOnly, )
     lookup_field = 'id'
     pagination_class = StandardResultsSetPagination
+    filter_backends = (DjangoFilterBackend, )
+    filterset_class = RecipeFilter
+
+    def get_search(self):
+        return self.request.query_params.get('search', '').strip()
+
+    def get_ordering(self):
+        default = settings.RECIPES_DEFAULT_ORDERING
+        if self.get_search():
+            default = 'relevance'
+        ordering = self.request.query_params.get('ordering', default)
+        if ordering == 'relevance' and not self.get_search():
+            return 'newest'
+        return ordering if ordering in RECIPE_ORDERINGS else 'newest'
+
+    def get_serializer_class(self):
+        return RECIPE_ACTION_SERIALIZERS.get(
+            self.action, super().get_serializer_class())
+
+    @property
+    def cursor_ordering(self):
+        if self.action == 'by_ingredients':
+            return COVERAGE_ORDERING
+        return RECIPE_ORDERINGS[self.get_ordering()]
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Recipe.objects.all()
-        is_favorited = self.request.query_params.get('is_favorited')
-        is_in_shopping_cart = self.request.query_params.get(
-            'is_in_shopping_cart'
-        )
-        if is_favorited is not None:
-            queryset = queryset.filter(recipe_favorites__user=user)
-        if is_in_shopping_cart is not None:
-            queryset = queryset.filter(recipe_shoppingcart__user=user)
-        return queryset.order_by('-pub_date')
+        queryset = Recipe.objects.for_read()
+        search = self.get_search()
+        if search:
+            queryset = queryset.search(search)
+        return queryset.order_by(*RECIPE_ORDERINGS[self.get_ordering()])
+
+    @action(
+        detail=False,
+        suffix=False,
+        methods=['GET'],
+        url_path='feed',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def subscriptions_feed(self, request):
+        cursor = None
+        if 'cursor' in request.query_params:
+            cursor = feed.decode_cursor(request.query_params['cursor'])
+            if cursor is None:
+                data = {'message': 'Некорректный курсор'}
+                return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        paginator = self.paginator
+        try:
+            limit = int(request.query_params.get(
+                paginator.page_size_query_param, paginator.page_size))
+        except ValueError:
+            limit = paginator.page_size
+        limit = min(max(limit, 1), paginator.max_page_size)
+        page, next_cursor = feed.get_feed_page(
+            request.user, membership.get_membership(request), cursor, limit)
+        next_link = None
+        if next_cursor is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), 'cursor', next_cursor)
+        serializer = self.get_serializer(page, many=True)
+        return Response({'next': next_link, 'results': serializer.data})
+
+    @action(
+        detail=True,
+        suffix=False,
+        methods=['GET'],
+        url_path='similar',
+    )
+    def similar(self, request, id=None):
+        recipes = Recipe.objects.filter(
+            similar_to__recipe_id=id
+        ).order_by('-similar_to__score', 'id')
+        recipes = recipes[:settings.SIMILAR_RECIPES_COUNT]
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        suffix=False,
+        methods=['GET'],
+        url_path='by_ingredients',
+    )
+    def by_ingredients(self, request):
+        try:
+            ingredient_ids = {
+                int(value)
+                for param in request.query_params.getlist('ingredients')
+                for value in param.split(',') if value.strip()
+            }
+        except ValueError:
+            data = {'message': 'Некорректный список ингредиентов'}
+            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        if not ingredient_ids:
+            data = {'message': 'Укажите хотя бы один ингредиент'}
+            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(
+            Recipe.objects.for_read()
+        ).with_coverage(ingredient_ids).order_by(*COVERAGE_ORDERING)
+        context = self.get_serializer_context()
+        context['ingredient_ids'] = ingredient_ids
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(
+                page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(
+            queryset, many=True, context=context)
+        return Response(serializer.data)
 
     @action(
         detail=False,
@@ -57,35 +179,46 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        shopping_cart = ShoppingCart.objects.filter(user=user)
-        if shopping_cart.count() < 1:
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format == 'pdf':
+            return self.download_shopping_cart_pdf(request)
+        if file_format not in RENDERERS:
+            data = {'message': 'Неподдерживаемый формат файла'}
+            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        rows = aggregate_shopping_cart(request.user).iterator()
+        first = next(rows, None)
+        if first is None:
+            data = {'message': 'Корзина пуста'}
+            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        renderer, content_type = RENDERERS[file_format]
+        response = StreamingHttpResponse(
+            renderer(chain((first, ), rows)),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename=shopping_cart.{file_format}')
+        return response
+
+    def download_shopping_cart_pdf(self, request):
+        content = get_shopping_cart_pdf(request.user)
+        if content is None:
             data = {'message': 'Корзина пуста'}
             return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
-        filename = 'shopping_cart.txt'
-        ings = {}
-        data = []
-        ingredients = shopping_cart.values_list(
-            'recipe__recipe_to_ingredient__ingredient__name',
-            'recipe__recipe_to_ingredient__ingredient__measurement_unit'
-        ).annotate(amount=Sum('recipe__recipe_to_ingredient__amount'))
-        for ingredient in ingredients:
-            name = ingredient[0]
-            amount = ingredient[2]
-            measure = ingredient[1]
-            ings[name] = [measure, amount]
-            if name in ings:
-                ings[name][1] += amount
-            else:
-                ings[name] = [measure, amount]
-        for key, value in ings.items():
-            result = f'{key}({value[0]}) - {value[1]}, '
-            data.append(result)
-        response = HttpResponse(data, content_type='text/plain; charset=UTF-8')
+        response = HttpResponse(content, content_type='application/pdf')
         response['Content-Disposition'] = (
-            'attachment; filename={0}'.format(filename))
+            'attachment; filename=shopping_cart.pdf')
         return response
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        bump_recipe_carts(serializer.instance)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        bump_recipe_carts(instance)
+        super().perform_destroy(instance)
+        UserStats.change_counter(instance.author_id, 'recipes_count', -1)
+
 
 class ShoppingCartViewSet(CreateDeleteViewSet):
     serializer_class = ShoppingCartSerializer
@@ -102,21 +235,32 @@ class ShoppingCartViewSet(CreateDeleteViewSet):
         pk = self.kwargs.get('id')
         recipe = get_object_or_404(Recipe, id=pk)
         try:
-            ShoppingCart.objects.create(user=request.user, recipe=recipe)
+            with transaction.atomic():
+                ShoppingCart.objects.create(user=request.user, recipe=recipe)
+                Recipe.objects.filter(pk=recipe.pk).change_counter(
+                    'in_carts_count', 1)
         except IntegrityError:
             data = {'message': 'Добавить рецеп в корзину можно только 1 раз.'}
             return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        membership.invalidate(request.user, membership.SHOPPING_CART)
+        bump_cart_version(request.user.id)
         serializer = RecipeToRepresentationSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, *args, **kwargs):
         pk = self.kwargs.get('id')
         recipe = get_object_or_404(Recipe, id=pk)
-        try:
-            ShoppingCart.objects.get(user=request.user, recipe=recipe).delete()
-        except ShoppingCart.DoesNotExist:
-            data = {'message': 'Такого рецепта нет в корзине'}
-            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            deleted, _ = ShoppingCart.objects.filter(
+                user=request.user, recipe=recipe).delete()
+            if not deleted:
+                data = {'message': 'Такого рецепта нет в корзине'}
+                return Response(
+                    data=data, status=status.HTTP_400_BAD_REQUEST)
+            Recipe.objects.filter(pk=recipe.pk).change_counter(
+                'in_carts_count', -1)
+        membership.invalidate(request.user, membership.SHOPPING_CART)
+        bump_cart_version(request.user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -135,38 +279,70 @@ class FavoriteViewSet(CreateDeleteViewSet):
         pk = self.kwargs.get('id')
         recipe = get_object_or_404(Recipe, id=pk)
         try:
-            Favorite.objects.create(user=request.user, recipe=recipe)
+            with transaction.atomic():
+                Favorite.objects.create(user=request.user, recipe=recipe)
+                Recipe.objects.filter(pk=recipe.pk).change_counter(
+                    'favorites_count', 1)
         except IntegrityError:
             data = {
                 'message': 'Добавить рецепт в избранное можно только 1 раз.'
             }
             return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        membership.invalidate(request.user, membership.FAVORITES)
         serializer = RecipeToRepresentationSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, *args, **kwargs):
         pk = self.kwargs.get('id')
         recipe = get_object_or_404(Recipe, id=pk)
-        try:
-            Favorite.objects.get(user=request.user, recipe=recipe).delete()
-        except Favorite.DoesNotExist:
-            data = {'message': 'Такого рецепта нет в корзине'}
-            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            deleted, _ = Favorite.objects.filter(
+                user=request.user, recipe=recipe).delete()
+            if not deleted:
+                data = {'message': 'Такого рецепта нет в избранном'}
+                return Response(
+                    data=data, status=status.HTTP_400_BAD_REQUEST)
+            Recipe.objects.filter(pk=recipe.pk).change_counter(
+                'favorites_count', -1)
+        membership.invalidate(request.user, membership.FAVORITES)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientsViewSet(ListRetriveViewSet):
+class IngredientsViewSet(CachedListRetriveViewSet):
     serializer_class = IngredientsListRetriveSerializer
     queryset = Ingredient.objects.all()
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter)
-    filterset_class = IngredientFilter
-    search_fields = ('name', )
+    cache_models = (Ingredient, )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, self.search, *args, **kwargs)
+
+    def search(self, request, *args, **kwargs):
+        name = request.query_params.get('name', '')
+        limit = settings.INGREDIENT_AUTOCOMPLETE_LIMIT if name else None
+        if 'limit' in request.query_params:
+            try:
+                limit = int(request.query_params['limit'])
+            except ValueError:
+                data = {'message': 'Параметр limit должен быть целым числом'}
+                return Response(
+                    data=data, status=status.HTTP_400_BAD_REQUEST)
+            limit = min(
+                max(limit, 0), settings.INGREDIENT_AUTOCOMPLETE_MAX_LIMIT)
+        ingredients = get_ingredient_index().search(name, limit)
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
 
 
 class UserCreateRetriveViewSet(CreateRetriveViewSet):
     serializer_class = UserRetrieveSerializer
     queryset = User.objects.all()
     pagination_class = StandardResultsSetPagination
+    cursor_ordering = ('id', )
+
+    def get_serializer_class(self):
+        if self.action == 'subscriptions':
+            return UserSubscriptionSerializer
+        return super().get_serializer_class()
 
     def get_permissions(self):
         if self.action == 'retrieve':
@@ -190,7 +366,8 @@ class UserCreateRetriveViewSet(CreateRetriveViewSet):
     )
     def me(self, request):
         user = request.user
-        serializer = UserRetrieveSerializer(user)
+        serializer = UserRetrieveSerializer(
+            user, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(
@@ -209,7 +386,7 @@ class UserCreateRetriveViewSet(CreateRetriveViewSet):
             return response
         current_password = request.data.get('current_password')
         new_password = request.data.get('new_password')
-        if not check_password(current_password, user.password):
+        if not passwords.run(check_password, current_password, user.password):
             response = Response(status=status.HTTP_400_BAD_REQUEST)
             response.data = {'message': 'Cтарый пароль неправильный'}
             return response
@@ -227,17 +404,19 @@ class UserCreateRetriveViewSet(CreateRetriveViewSet):
         permission_classes=(permissions.IsAuthenticated,),
     )
     def subscriptions(self, request):
-        subscriptions = Subscription.objects.filter(
-            subscriber=request.user)
-        data = []
-        if subscriptions is not None:
-            for subscription in subscriptions:
-                data.append(subscription.author)
+        data = User.objects.filter(
+            author__subscriber=request.user
+        ).annotate(
+            recipes_count=Coalesce('stats__recipes_count', 0),
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).prefetch_related(
+            latest_recipes_prefetch(get_recipes_limit(request))
+        ).order_by('id')
         page = self.paginate_queryset(data)
         if page is not None:
-            serializer = UserSubscriptionSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
-        serializer = UserSubscriptionSerializer(data, many=True)
+        serializer = self.get_serializer(data, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -256,24 +435,37 @@ class SubscriptionViewSet(CreateDeleteViewSet):
         pk = self.kwargs.get('id')
         author = get_object_or_404(User, id=pk)
         try:
-            Subscription.objects.create(
-                subscriber=request.user,
-                author=author
-            )
+            with transaction.atomic():
+                Subscription.objects.create(
+                    subscriber=request.user,
+                    author=author
+                )
+                UserStats.change_counter(author.id, 'subscribers_count', 1)
+                UserStats.change_counter(
+                    request.user.id, 'subscriptions_count', 1)
+                feed.on_subscribe(request.user, author)
         except IntegrityError:
             response = Response(status=status.HTTP_400_BAD_REQUEST)
             response.data = {'message': 'Подписаться можно только 1 раз.'}
             return response
-        serializer = UserSubscriptionSerializer(author)
+        membership.invalidate(request.user, membership.SUBSCRIPTIONS)
+        serializer = UserSubscriptionSerializer(
+            author, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, *args, **kwargs):
         pk = self.kwargs.get('id')
         author = get_object_or_404(User, id=pk)
-        try:
-            Subscription.objects.get(
+        with transaction.atomic():
+            deleted, _ = Subscription.objects.filter(
                 author=author, subscriber=request.user).delete()
-        except Subscription.DoesNotExist:
-            data = {'message': 'Вы не подписаны на этого пользователя'}
-            return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+            if not deleted:
+                data = {'message': 'Вы не подписаны на этого пользователя'}
+                return Response(
+                    data=data, status=status.HTTP_400_BAD_REQUEST)
+            UserStats.change_counter(author.id, 'subscribers_count', -1)
+            UserStats.change_counter(
+                request.user.id, 'subscriptions_count', -1)
+            feed.on_unsubscribe(request.user, author)
+        membership.invalidate(request.user, membership.SUBSCRIPTIONS)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+from api import metrics
+from . import pool
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_checked_at = 0.0
+
+    def get_pool(self):
+        if not settings.DB_POOL:
+            return None
+        return pool.get_pool(
+            self.alias,
+            size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+            timeout=settings.DB_POOL_TIMEOUT,
+            recycle=settings.DB_POOL_RECYCLE,
+            health_check_interval=settings.DB_HEALTH_CHECK_INTERVAL,
+        )
+
+    def get_new_connection(self, conn_params):
+        connection_pool = self.get_pool()
+        if connection_pool is None:
+            connection = super().get_new_connection(conn_params)
+        else:
+            connection = connection_pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params),
+                is_usable,
+            )
+        self.health_checked_at = time.monotonic()
+        return connection
+
+    def _close(self):
+        connection_pool = self.get_pool()
+        if connection_pool is None or self.connection is None:
+            return super()._close()
+        connection = self.connection
+        try:
+            if not connection.closed and not connection.autocommit:
+                connection.rollback()
+        except Exception:
+            connection_pool.discard(connection)
+            connection_pool.release_slot()
+            return
+        connection_pool.release(connection)
+
+    def close_if_unusable_or_obsolete(self):
+        interval = settings.DB_HEALTH_CHECK_INTERVAL
+        now = time.monotonic()
+        if (self.connection is not None and interval
+                and now - self.health_checked_at > interval
+                and not self.in_atomic_block):
+            self.health_checked_at = now
+            if not self.is_usable():
+                self.close()
+        super().close_if_unusable_or_obsolete()
+
+
+metrics.register_collector(pool.collect_stats)
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+_pools = {}
+_pools_lock = threading.Lock()
+_inherited = []
+
+
+class ConnectionPool:
+    def __init__(self, size, max_overflow, timeout, recycle,
+                 health_check_interval):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.health_check_interval = health_check_interval
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.created = {}
+        self.in_use = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.discarded = 0
+
+    def acquire(self, connect, is_usable):
+        started = time.monotonic()
+        waited = False
+        with self.condition:
+            while not self.idle and (
+                    self.in_use >= self.size + self.max_overflow):
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise OperationalError(
+                        'Нет свободных соединений с базой данных')
+                self.condition.wait(remaining)
+            if waited:
+                self.waits += 1
+                self.wait_time += time.monotonic() - started
+            self.in_use += 1
+            connection, released_at = (
+                self.idle.pop() if self.idle else (None, None))
+        try:
+            if connection is not None and not self.is_fresh(
+                    connection, released_at, is_usable):
+                self.discard(connection)
+                connection = None
+            if connection is None:
+                connection = connect()
+                self.created[id(connection)] = time.monotonic()
+            return connection
+        except Exception:
+            self.release_slot()
+            raise
+
+    def is_fresh(self, connection, released_at, is_usable):
+        now = time.monotonic()
+        if connection.closed:
+            return False
+        if self.recycle and now - self.created.get(id(connection), 0) > (
+                self.recycle):
+            return False
+        if self.health_check_interval and now - released_at > (
+                self.health_check_interval):
+            return is_usable(connection)
+        return True
+
+    def release(self, connection):
+        if connection.closed:
+            self.created.pop(id(connection), None)
+        else:
+            with self.condition:
+                if len(self.idle) < self.size:
+                    self.idle.append((connection, time.monotonic()))
+                    connection = None
+            if connection is not None:
+                self.discard(connection)
+        self.release_slot()
+
+    def release_slot(self):
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+
+    def discard(self, connection):
+        self.created.pop(id(connection), None)
+        self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.condition:
+            return {
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waits_total': self.waits,
+                'wait_seconds_total': round(self.wait_time, 6),
+                'discarded_total': self.discarded,
+            }
+
+
+def get_pool(alias, **options):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(**options)
+        return pool
+
+
+def reset_after_fork():
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    for pool in _pools.values():
+        _inherited.extend(connection for connection, _ in pool.idle)
+    _pools.clear()
+
+
+def collect_stats():
+    with _pools_lock:
+        pools = sorted(_pools.items())
+    if not pools:
+        return
+    fields = ('in_use', 'idle', 'waits_total', 'wait_seconds_total',
+              'discarded_total')
+    for field in fields:
+        metric = f'foodgram_db_pool_{field}'
+        kind = 'counter' if field.endswith('_total') else 'gauge'
+        yield f'# TYPE {metric} {kind}'
+        for alias, pool in pools:
+            yield f'{metric}{{alias="{alias}"}} {pool.stats()[field]}'
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
@@ -1,5 +1,7 @@
+import hashlib
 import os
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,13 +27,12 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
-    'recipes.managment',
-    'recipes.managment.commands',
     'djoser',
     'rest_framework.authtoken',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,17 +64,56 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram_project_react.wsgi.application'
 
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', default=8))
+
+DB_POOL = os.getenv('DB_POOL', default='False') == 'True'
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default=5))
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', default=5))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', default=5))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', default=1800))
+DB_HEALTH_CHECK_INTERVAL = int(
+    os.getenv('DB_HEALTH_CHECK_INTERVAL', default=30)
+)
+
+POOLED_ENGINE = 'foodgram_project_react.db'
+DB_ENGINE = os.getenv('DB_ENGINE', default=POOLED_ENGINE)
+if DB_ENGINE in ('django.db.backends.postgresql',
+                 'django.db.backends.postgresql_psycopg2'):
+    DB_ENGINE = POOLED_ENGINE
+if DB_POOL and DB_ENGINE != POOLED_ENGINE:
+    raise ImproperlyConfigured(
+        f'DB_POOL=True не поддерживается для DB_ENGINE={DB_ENGINE}')
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv(
+            'DB_CONN_MAX_AGE', default=0 if DB_POOL else 60)),
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+CACHE_SHARED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+MODEL_VERSION_LOCAL_TTL = int(
+    os.getenv('MODEL_VERSION_LOCAL_TTL', default=60)
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,10 +153,110 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 }
 
+MEMBERSHIP_CACHE_TIMEOUT = int(
+    os.getenv('MEMBERSHIP_CACHE_TIMEOUT', default=300)
+)
+
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+SHOPPING_CART_PDF_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_CART_PDF_CACHE_TIMEOUT', default=60 * 60 * 24)
+)
+
+PAGINATION_LEGACY_COUNT = os.getenv(
+    'PAGINATION_LEGACY_COUNT', default='True') == 'True'
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', default=30)
+)
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv('PAGINATION_COUNT_ESTIMATE_THRESHOLD', default=100000)
+)
+
+INGREDIENT_AUTOCOMPLETE_LIMIT = int(
+    os.getenv('INGREDIENT_AUTOCOMPLETE_LIMIT', default=20)
+)
+INGREDIENT_AUTOCOMPLETE_MAX_LIMIT = int(
+    os.getenv('INGREDIENT_AUTOCOMPLETE_MAX_LIMIT', default=1000)
+)
+
+REFERENCE_CACHE_TIMEOUT = int(
+    os.getenv('REFERENCE_CACHE_TIMEOUT', default=60 * 60)
+)
+REFERENCE_CACHE_MAX_AGE = int(os.getenv('REFERENCE_CACHE_MAX_AGE', default=60))
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=5 * 1024 * 1024)
+)
+THUMBNAIL_WIDTHS = tuple(
+    int(width)
+    for width in os.getenv('THUMBNAIL_WIDTHS', default='480,960').split(',')
+)
+THUMBNAIL_FORMAT = os.getenv('THUMBNAIL_FORMAT', default='WEBP')
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', default=2))
+
+RECIPES_DEFAULT_ORDERING = os.getenv(
+    'RECIPES_DEFAULT_ORDERING', default='newest')
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', default=7))
+TRENDING_HALF_LIFE_HOURS = int(
+    os.getenv('TRENDING_HALF_LIFE_HOURS', default=24)
+)
+
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', default=10))
+SIMILAR_MAX_POSTING = int(os.getenv('SIMILAR_MAX_POSTING', default=1000))
+SIMILAR_MAX_CANDIDATES = int(os.getenv('SIMILAR_MAX_CANDIDATES', default=50))
+
+FEED_INBOX_THRESHOLD = int(os.getenv('FEED_INBOX_THRESHOLD', default=500))
+FEED_INBOX_BACKFILL = int(os.getenv('FEED_INBOX_BACKFILL', default=20))
+FEED_AUTHOR_BATCH_SIZE = int(os.getenv('FEED_AUTHOR_BATCH_SIZE', default=500))
+
+METRICS_SERVER_TIMING = os.getenv(
+    'METRICS_SERVER_TIMING', default='True') == 'True'
+QUERY_BUDGETS = {
+    endpoint.strip(): int(budget)
+    for endpoint, _, budget in (
+        item.partition('=') for item in os.getenv(
+            'QUERY_BUDGETS',
+            default='RecipeViewSet.list=8,RecipeViewSet.retrieve=6,'
+                    'UserCreateRetriveViewSet.subscriptions=6'
+        ).split(',') if item.strip()
+    )
+}
+QUERY_BUDGETS_STRICT = os.getenv(
+    'QUERY_BUDGETS_STRICT', default='False') == 'True'
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', default=5))
+TOKEN_CACHE_SHARED = CACHE_SHARED and (
+    os.getenv('TOKEN_CACHE_SHARED', default='False') == 'True')
+TOKEN_CACHE_SHARED_TTL = int(os.getenv('TOKEN_CACHE_SHARED_TTL', default=60))
+
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv('PASSWORD_HASHING_WORKERS', default=2)
+)
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', default=8))
+PASSWORD_HASHING_TIMEOUT = int(
+    os.getenv('PASSWORD_HASHING_TIMEOUT', default=10)
+)
+PASSWORD_HASHING_RETRY_AFTER = int(
+    os.getenv('PASSWORD_HASHING_RETRY_AFTER', default=1)
+)
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'users.hashers.ScryptPasswordHasher',
+]
+if (os.getenv('PASSWORD_HASHER', default='pbkdf2') == 'scrypt'
+        and hasattr(hashlib, 'scrypt')):
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop())
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
 }
@@ -0,0 +1,7 @@
+import os
+
+bind = '0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', default=1))
+
+if os.getenv('SERVER_MODE', default='wsgi') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
@@ -13,14 +13,13 @@ class RecipeAdmin(admin.ModelAdmin):
         'image',
         'text',
         'cooking_time',
-        'favorites_count'
+        'favorites_count',
+        'in_carts_count'
     )
     search_fields = ('name', 'author', 'tags')
+    readonly_fields = ('favorites_count', 'in_carts_count')
     empty_value_display = '-пусто-'
 
-    def favorites_count(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
-
     def ingredients(self, obj):
         return "\n".join([a for a in obj.values(
             'recipe_to_ingredient__ingredient__name'
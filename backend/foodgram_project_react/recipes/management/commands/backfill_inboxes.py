@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.feed import backfill_inboxes
+
+
+class Command(BaseCommand):
+    help = 'Заполняет ленты подписок пользователей с большим числом подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append')
+
+    def handle(self, *args, **options):
+        count = backfill_inboxes(options['user'])
+        self.stdout.write(self.style.SUCCESS(f'Заполнено лент: {count}'))
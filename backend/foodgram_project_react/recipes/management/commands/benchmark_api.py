@@ -0,0 +1,217 @@
+import base64
+import json
+import math
+import random
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+from .generate_dataset import sample_png
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, rank):
+    values = sorted(values)
+    return values[max(math.ceil(rank / 100 * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержки основных сценариев API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--user', type=int)
+        parser.add_argument('--output')
+        parser.add_argument('--compare')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        user = self.get_user(options['user'])
+        token, _ = Token.objects.get_or_create(user=user)
+        host = 'localhost'
+        if host not in settings.ALLOWED_HOSTS and '*' not in (
+                settings.ALLOWED_HOSTS):
+            host = settings.ALLOWED_HOSTS[0].lstrip('.')
+        self.client = APIClient(HTTP_HOST=host)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.recipe_ids = list(
+            Recipe.objects.values_list('id', flat=True)[:10000])
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)[:10000])
+        self.ingredient_names = list(
+            Ingredient.objects.values_list('name', flat=True)[:10000])
+        self.tags = list(Tag.objects.values_list('id', 'slug'))
+        if not (self.recipe_ids and self.ingredient_ids and self.tags):
+            raise CommandError(
+                'Нет данных: сначала выполните generate_dataset')
+        self.image = 'data:image/png;base64,' + base64.b64encode(
+            sample_png()).decode()
+        self.created = []
+        flows = OrderedDict((
+            ('feed_list', self.feed_list),
+            ('feed_filtered', self.feed_filtered),
+            ('recipe_detail', self.recipe_detail),
+            ('subscriptions', self.subscriptions),
+            ('download_shopping_cart', self.download_shopping_cart),
+            ('ingredient_search', self.ingredient_search),
+            ('recipe_create', self.recipe_create),
+            ('recipe_update', self.recipe_update),
+        ))
+        results = OrderedDict()
+        try:
+            for name, flow in flows.items():
+                results[name] = self.measure(
+                    flow, options['requests'], options['warmup'])
+                self.report(name, results[name])
+        finally:
+            for recipe_id in self.created:
+                self.client.delete(f'/api/recipes/{recipe_id}/')
+        output = options['output'] or timezone.now().strftime(
+            'benchmark-%Y%m%d-%H%M%S.json')
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump({
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'user': user.id,
+                'requests': options['requests'],
+                'dataset': {
+                    'users': User.objects.count(),
+                    'recipes': Recipe.objects.count(),
+                    'ingredients': len(self.ingredient_ids),
+                },
+                'results': results,
+            }, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {output}'))
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def get_user(self, user_id):
+        if user_id is not None:
+            return User.objects.get(id=user_id)
+        user = User.objects.filter(
+            subscriber__isnull=False,
+            user_shoppingcart__isnull=False,
+        ).order_by('id').first()
+        if user is None:
+            raise CommandError('Нет пользователя с подписками и корзиной')
+        return user
+
+    def measure(self, flow, requests, warmup):
+        for _ in range(warmup):
+            flow()
+        latencies = []
+        queries = []
+        errors = 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = flow()
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+            errors += response.status_code >= 400
+        allocations = []
+        for _ in range(min(requests, 10)):
+            tracemalloc.start()
+            flow()
+            allocations.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        result = OrderedDict(
+            (f'p{rank}_ms', round(percentile(latencies, rank), 2))
+            for rank in PERCENTILES
+        )
+        result['queries_mean'] = round(sum(queries) / len(queries), 2)
+        result['queries_max'] = max(queries)
+        result['peak_allocated_kb'] = round(
+            percentile(allocations, 50) / 1024, 1)
+        result['errors'] = errors
+        return result
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<24} p50={result["p50_ms"]}ms p95={result["p95_ms"]}ms '
+            f'p99={result["p99_ms"]}ms queries={result["queries_mean"]} '
+            f'alloc={result["peak_allocated_kb"]}KB errors={result["errors"]}'
+        )
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)['results']
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            before = previous[name]['p95_ms']
+            change = 0
+            if before:
+                change = (result['p95_ms'] - before) / before * 100
+            self.stdout.write(
+                f'{name:<24} p95 {before}ms -> {result["p95_ms"]}ms '
+                f'({change:+.1f}%), queries '
+                f'{previous[name]["queries_mean"]} -> {result["queries_mean"]}'
+            )
+
+    def feed_list(self):
+        return self.client.get('/api/recipes/')
+
+    def feed_filtered(self):
+        _, slug = self.rng.choice(self.tags)
+        return self.client.get(
+            f'/api/recipes/?tags={slug}&ordering=popular&limit=12')
+
+    def recipe_detail(self):
+        return self.client.get(
+            f'/api/recipes/{self.rng.choice(self.recipe_ids)}/')
+
+    def subscriptions(self):
+        return self.client.get('/api/users/subscriptions/?recipes_limit=3')
+
+    def download_shopping_cart(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        if hasattr(response, 'streaming_content'):
+            b''.join(response.streaming_content)
+        return response
+
+    def ingredient_search(self):
+        name = self.rng.choice(self.ingredient_names)
+        return self.client.get(
+            '/api/ingredients/', {'name': name[:self.rng.randint(1, 4)]})
+
+    def recipe_payload(self):
+        return {
+            'name': 'Тестовый рецепт',
+            'text': 'Описание тестового рецепта',
+            'cooking_time': self.rng.randint(5, 120),
+            'image': self.image,
+            'tags': [self.rng.choice(self.tags)[0]],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': self.rng.randint(1, 500)}
+                for ingredient_id in self.rng.sample(self.ingredient_ids, 5)
+            ],
+        }
+
+    def recipe_create(self):
+        response = self.client.post(
+            '/api/recipes/', self.recipe_payload(), format='json')
+        if response.status_code == 201:
+            self.created.append(response.data['id'])
+        return response
+
+    def recipe_update(self):
+        if not self.created:
+            self.recipe_create()
+        return self.client.patch(
+            f'/api/recipes/{self.rng.choice(self.created)}/',
+            self.recipe_payload(), format='json')
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+from .benchmark_api import PERCENTILES, percentile
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    if lines[0].startswith('HTTP/1.0'):
+        return status, headers.get('connection') == 'keep-alive'
+    return status, headers.get('connection') != 'close'
+
+
+async def client(target, request, deadline, latencies, errors):
+    writer = None
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(*target)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            errors['connection'] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status >= 400:
+            errors[str(status)] += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def slow_client(target, request, deadline):
+    try:
+        _, writer = await asyncio.open_connection(*target)
+    except OSError:
+        return
+    for byte in request:
+        if time.monotonic() >= deadline:
+            break
+        writer.write(bytes((byte, )))
+        await writer.drain()
+        await asyncio.sleep(1)
+    writer.close()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет пропускную способность сервера при параллельных запросах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--connections', type=int, default=50)
+        parser.add_argument('--slow-clients', type=int, default=0)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--token')
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        target = (url.hostname, url.port or 80)
+        path = url.path + (f'?{url.query}' if url.query else '') or '/'
+        headers = [f'GET {path} HTTP/1.1', f'Host: {url.netloc}']
+        if options['token']:
+            headers.append(f'Authorization: Token {options["token"]}')
+        request = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+        latencies = []
+        errors = Counter()
+        started = time.monotonic()
+        deadline = started + options['duration']
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(asyncio.gather(
+            *(client(target, request, deadline, latencies, errors)
+              for _ in range(options['connections'])),
+            *(slow_client(target, request, deadline)
+              for _ in range(options['slow_clients'])),
+        ))
+        elapsed = time.monotonic() - started
+        result = {
+            'url': options['url'],
+            'connections': options['connections'],
+            'slow_clients': options['slow_clients'],
+            'duration_s': round(elapsed, 2),
+            'requests': len(latencies),
+            'requests_per_s': round(len(latencies) / elapsed, 1),
+            'errors': dict(errors),
+        }
+        if latencies:
+            result.update(
+                (f'p{rank}_ms', round(percentile(latencies, rank), 2))
+                for rank in PERCENTILES
+            )
+        self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
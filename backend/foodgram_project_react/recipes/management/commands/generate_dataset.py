@@ -0,0 +1,198 @@
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag)
+from recipes.storage import recipe_image_storage
+from users.models import Subscription, User
+
+PASSWORD = 'benchmark-password'
+
+
+def sample_png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 60)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class Zipf:
+    def __init__(self, rng, items, exponent=1.0):
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)
+        ))
+
+    def sample(self, k):
+        return set(self.rng.choices(
+            self.items, cum_weights=self.cum_weights, k=k))
+
+
+@contextmanager
+def explicit_dates(*fields):
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Создаёт воспроизводимый синтетический набор данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=12)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--subscriptions', type=int, default=10)
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.period = timedelta(days=options['days']).total_seconds()
+        prefix = f'bench{options["seed"]}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Данные с seed={options["seed"]} уже созданы')
+        started = time.monotonic()
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True))
+        tag_ids = self.create_tags(options['tags'])
+        with transaction.atomic():
+            user_ids = self.create_users(prefix, options['users'])
+            recipe_ids = self.create_recipes(
+                user_ids, ingredient_ids, tag_ids, options)
+            self.create_relations(Favorite, user_ids, recipe_ids,
+                                  options['favorites'])
+            self.create_relations(ShoppingCart, user_ids, recipe_ids,
+                                  options['carts'])
+            self.create_subscriptions(user_ids, options['subscriptions'])
+        call_command('reconcile_counters', stdout=self.stdout)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, рецептов: '
+            f'{len(recipe_ids)} за {elapsed:.1f} с. '
+            f'Пароль пользователей: {PASSWORD}'
+        ))
+
+    def random_date(self):
+        return self.now - timedelta(
+            seconds=self.period * self.rng.random() ** 2)
+
+    def count(self, mean, limit):
+        return min(int(mean * self.rng.paretovariate(2.0) / 2), limit)
+
+    def create_tags(self, count):
+        existing = set(Tag.objects.values_list('slug', flat=True))
+        Tag.objects.bulk_create(
+            Tag(name=f'Тег {number}', slug=f'tag{number}',
+                color='#{0:06x}'.format(self.rng.randrange(0x1000000)))
+            for number in range(count) if f'tag{number}' not in existing
+        )
+        return list(Tag.objects.filter(
+            slug__in=[f'tag{number}' for number in range(count)]
+        ).values_list('id', flat=True))
+
+    def create_users(self, prefix, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (User(username=f'{prefix}{number}',
+                  email=f'{prefix}{number}@example.com',
+                  first_name='Имя', last_name='Фамилия',
+                  password=password)
+             for number in range(count)),
+            batch_size=self.batch_size,
+        )
+        return list(User.objects.filter(
+            username__startswith=prefix
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, user_ids, ingredient_ids, tag_ids, options):
+        authors = Zipf(self.rng, user_ids)
+        ingredients = Zipf(self.rng, ingredient_ids)
+        names = dict(Ingredient.objects.values_list('id', 'name'))
+        image = recipe_image_storage.save(
+            'recipes/benchmark.png', ContentFile(sample_png()))
+        first_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        recipes = []
+        compositions = []
+        for _ in range(options['recipes']):
+            composition = sorted(ingredients.sample(
+                self.rng.randint(2, options['ingredients_per_recipe'] * 2)))
+            title = ' и '.join(names[i] for i in composition[:2])
+            recipes.append(Recipe(
+                author_id=authors.sample(1).pop(),
+                name=title.capitalize()[:200],
+                text=', '.join(names[i] for i in composition),
+                image=image,
+                cooking_time=self.rng.randint(5, 180),
+                pub_date=self.random_date(),
+            ))
+            compositions.append(composition)
+        with explicit_dates(Recipe._meta.get_field('pub_date')):
+            Recipe.objects.bulk_create(recipes, batch_size=self.batch_size)
+        recipe_ids = list(Recipe.objects.filter(
+            id__gt=first_id).order_by('id').values_list('id', flat=True))
+        RecipeIngredient.objects.bulk_create(
+            (RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                              amount=self.rng.randint(1, 500))
+             for recipe_id, composition in zip(recipe_ids, compositions)
+             for ingredient_id in composition),
+            batch_size=self.batch_size,
+        )
+        RecipeTag.objects.bulk_create(
+            (RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+             for recipe_id in recipe_ids
+             for tag_id in self.rng.sample(
+                 tag_ids, self.rng.randint(1, min(3, len(tag_ids))))),
+            batch_size=self.batch_size,
+        )
+        return recipe_ids
+
+    def create_relations(self, model, user_ids, recipe_ids, mean):
+        popularity = Zipf(self.rng, recipe_ids)
+        with explicit_dates(model._meta.get_field('created')):
+            model.objects.bulk_create(
+                (model(user_id=user_id, recipe_id=recipe_id,
+                       created=self.random_date())
+                 for user_id in user_ids
+                 for recipe_id in popularity.sample(
+                     self.count(mean, len(recipe_ids)))),
+                batch_size=self.batch_size,
+            )
+
+    def create_subscriptions(self, user_ids, mean):
+        popularity = Zipf(self.rng, user_ids)
+        Subscription.objects.bulk_create(
+            (Subscription(subscriber_id=user_id, author_id=author_id)
+             for user_id in user_ids
+             for author_id in popularity.sample(
+                 self.count(mean, len(user_ids)))
+             if author_id != user_id),
+            batch_size=self.batch_size,
+        )
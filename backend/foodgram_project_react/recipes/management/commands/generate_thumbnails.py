@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.images import make_thumbnails
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие превью картинок рецептов'
+
+    def handle(self, *args, **options):
+        names = Recipe.objects.filter(has_thumbnails=False).exclude(
+            image=''
+        ).order_by().values_list('image', flat=True).distinct()
+        updated = 0
+        failed = 0
+        for name in list(names):
+            try:
+                make_thumbnails(name)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+                continue
+            updated += Recipe.objects.filter(image=name).update(
+                has_thumbnails=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Превью созданы для {updated} рецептов, ошибок: {failed}'))
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.caching import bump_model_version
+from recipes.models import Ingredient
+
+DEFAULT_PATH = os.path.join(
+    settings.BASE_DIR, '..', '..', 'data', 'ingredients.csv'
+)
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if len(row) >= 2:
+                yield row[0], row[1]
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as file:
+        for item in json.load(file):
+            yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из csv или json файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только .csv и .json файлы')
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        started = time.monotonic()
+        rows = {}
+        for name, measurement_unit in reader(path):
+            name = name.strip()
+            measurement_unit = measurement_unit.strip()
+            if name and measurement_unit:
+                rows[(name, measurement_unit)] = None
+        rows = list(rows)
+        if connection.vendor == 'postgresql':
+            created = self.copy(rows)
+        else:
+            created = self.bulk_create(rows, options['batch_size'])
+        bump_model_version(Ingredient)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано {len(rows)} ингредиентов, добавлено {created} '
+            f'за {elapsed:.2f} с ({len(rows) / elapsed:.0f} строк/с)'
+        ))
+
+    def bulk_create(self, rows, batch_size):
+        ingredients = [
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in rows
+        ]
+        fields = [
+            Ingredient._meta.get_field(name)
+            for name in ('name', 'measurement_unit')
+        ]
+        max_batch_size = max(
+            connection.ops.bulk_batch_size(fields, ingredients), 1)
+        batch_size = min(batch_size or max_batch_size, max_batch_size)
+        before = Ingredient.objects.count()
+        Ingredient.objects.bulk_create(
+            ingredients,
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        return Ingredient.objects.count() - before
+
+    def copy(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        table = Ingredient._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredients_import '
+                '(name varchar(200), measurement_unit varchar(200)) '
+                'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredients_import FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT name, measurement_unit FROM ingredients_import '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.feed import backfill_inboxes
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, UserStats
+
+User = get_user_model()
+
+
+def count_subquery(model, field, outer='pk'):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(outer)}).order_by().values(
+            field).annotate(total=Count('pk')).values('total'),
+        output_field=models.IntegerField()
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики рецептов и авторов'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.update(
+            favorites_count=count_subquery(Favorite, 'recipe'),
+            in_carts_count=count_subquery(ShoppingCart, 'recipe'),
+        )
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=user_id) for user_id in User.objects.filter(
+                stats__isnull=True).values_list('id', flat=True)),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        users = UserStats.objects.update(
+            recipes_count=count_subquery(Recipe, 'author', 'user_id'),
+            subscribers_count=count_subquery(
+                Subscription, 'author', 'user_id'),
+            subscriptions_count=count_subquery(
+                Subscription, 'subscriber', 'user_id'),
+        )
+        inboxes = backfill_inboxes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}, '
+            f'заполнено лент: {inboxes}'
+        ))
@@ -0,0 +1,79 @@
+import random
+import resource
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import RecipeIngredient, RecipeSimilarity, RecipeTag
+from recipes.similarity import build_features, top_neighbors
+
+
+def synthetic_rows(recipes, ingredients=2000, tags=10, per_recipe=8, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, ingredients + 1)]
+    ingredient_rows = []
+    tag_rows = []
+    for recipe_id in range(1, recipes + 1):
+        for ingredient_id in set(rng.choices(
+                range(ingredients), weights, k=per_recipe)):
+            ingredient_rows.append((recipe_id, ingredient_id))
+        for tag_id in rng.sample(range(tags), rng.randint(1, 3)):
+            tag_rows.append((recipe_id, tag_id))
+    return ingredient_rows, tag_rows
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие рецепты по ингредиентам и тегам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark', type=int, metavar='RECIPES',
+            help='Построить соседей для синтетических данных без записи в бд'
+        )
+
+    def build(self, ingredient_rows, tag_rows):
+        features = build_features(ingredient_rows, tag_rows)
+        neighbors = list(top_neighbors(
+            features,
+            settings.SIMILAR_RECIPES_COUNT,
+            settings.SIMILAR_MAX_POSTING,
+            settings.SIMILAR_MAX_CANDIDATES,
+        ))
+        return features, neighbors
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options['benchmark'])
+        features, neighbors = self.build(
+            RecipeIngredient.objects.filter(
+                recipe__isnull=False, ingredient__isnull=False
+            ).values_list('recipe_id', 'ingredient_id').iterator(),
+            RecipeTag.objects.filter(
+                recipe__isnull=False, tag__isnull=False
+            ).values_list('recipe_id', 'tag_id').iterator(),
+        )
+        with transaction.atomic():
+            RecipeSimilarity.objects.all().delete()
+            RecipeSimilarity.objects.bulk_create(
+                (RecipeSimilarity(recipe_id=recipe_id, similar_id=similar_id,
+                                  score=score)
+                 for recipe_id, scored in neighbors
+                 for score, similar_id in scored if score > 0),
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты обновлены для {len(features)} рецептов'
+        ))
+
+    def benchmark(self, recipes):
+        ingredient_rows, tag_rows = synthetic_rows(recipes)
+        started = time.perf_counter()
+        _, neighbors = self.build(ingredient_rows, tag_rows)
+        elapsed = time.perf_counter() - started
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(
+            f'recipes={recipes} neighbors={len(neighbors)} '
+            f'build_seconds={elapsed:.1f} peak_rss_mb={peak // 1024}'
+        )
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+BATCH_SIZE = 1000
+WEIGHTS = (
+    (Favorite, 1.0),
+    (ShoppingCart, 0.5),
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг популярных за последнее время рецептов'
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+        half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+        scores = defaultdict(float)
+        for model, weight in WEIGHTS:
+            rows = model.objects.filter(
+                created__gte=since, recipe__isnull=False
+            ).values_list('recipe_id', 'created').iterator()
+            for recipe_id, created in rows:
+                age = (now - created).total_seconds()
+                scores[recipe_id] += weight * 0.5 ** (age / half_life)
+        with transaction.atomic():
+            current = dict(Recipe.objects.exclude(
+                trending_score=0).values_list('id', 'trending_score'))
+            stale = [
+                recipe_id for recipe_id in current if recipe_id not in scores
+            ]
+            for start in range(0, len(stale), BATCH_SIZE):
+                Recipe.objects.filter(
+                    id__in=stale[start:start + BATCH_SIZE]
+                ).update(trending_score=0)
+            Recipe.objects.bulk_update(
+                [Recipe(id=recipe_id, trending_score=score)
+                 for recipe_id, score in scores.items()
+                 if current.get(recipe_id) != score],
+                ['trending_score'],
+                batch_size=BATCH_SIZE,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг обновлён для {len(scores)} рецептов'
+        ))
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    groups = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        survivor=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for group in groups:
+        survivor = group['survivor']
+        duplicates = list(Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit'],
+        ).exclude(id=survivor).values_list('id', flat=True))
+        kept = {}
+        removed = []
+        for link in RecipeIngredient.objects.filter(
+                ingredient_id__in=[survivor] + duplicates,
+                recipe__isnull=False,
+        ).order_by('id'):
+            first = kept.get(link.recipe_id)
+            if first is None:
+                kept[link.recipe_id] = link
+            else:
+                first.amount += link.amount
+                removed.append(link.id)
+        RecipeIngredient.objects.filter(id__in=removed).delete()
+        for link in kept.values():
+            link.ingredient_id = survivor
+            link.save(update_fields=['ingredient', 'amount'])
+        RecipeIngredient.objects.filter(
+            ingredient_id__in=duplicates).update(ingredient_id=survivor)
+        Ingredient.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0007_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop,
+            atomic=True,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='ingredient_unique'),
+        ),
+    ]
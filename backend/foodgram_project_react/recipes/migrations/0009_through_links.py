@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def copy_tag_links(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeTag = apps.get_model('recipes', 'RecipeTag')
+    RecipeTag.objects.bulk_create(
+        (RecipeTag(recipe_id=link.recipe_id, tag_id=link.tag_id)
+         for link in Recipe.tags.through.objects.all()),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_ingredient_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_tag_links, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='tags',
+        ),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='ingredients',
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='tags',
+            field=models.ManyToManyField(related_name='recipes', through='recipes.RecipeTag', to='recipes.Tag', verbose_name='Теги'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients',
+            field=models.ManyToManyField(related_name='recipes', through='recipes.RecipeIngredient', to='recipes.Ingredient', verbose_name='Ингредиенты'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipesimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='has_thumbnails',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Превью созданы'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copy_trending_scores(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeTrend = apps.get_model('recipes', 'RecipeTrend')
+    Recipe.objects.filter(
+        pk__in=RecipeTrend.objects.values('recipe_id')
+    ).update(trending_score=Coalesce(Subquery(
+        RecipeTrend.objects.filter(recipe=OuterRef('pk')).values('score')[:1]
+    ), 0.0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_image_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, verbose_name='Рейтинг за последнее время'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_score_idx'),
+        ),
+        migrations.RunPython(copy_trending_scores, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='RecipeTrend',
+        ),
+    ]
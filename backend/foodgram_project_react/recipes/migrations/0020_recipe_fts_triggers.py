@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from recipes.search import (SQLITE_CREATE_TRIGGERS, SQLITE_DROP_TRIGGERS,
+                            SQLITE_REBUILD)
+
+
+def recreate_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_DROP_TRIGGERS + SQLITE_CREATE_TRIGGERS:
+        schema_editor.execute(statement)
+    schema_editor.execute(SQLITE_REBUILD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_feedinbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
-from django.db import models
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.db import connections, models
+from django.db.models import (Count, ExpressionWrapper, F, OuterRef,
+                              Prefetch, Subquery)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Greatest
 from django.core.validators import MinValueValidator
 
 from users.models import User
+from .storage import recipe_image_storage
 
 
 class Tag(models.Model):
@@ -38,11 +45,68 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'measurement_unit'],
+                                    name='ingredient_unique')
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def change_counter(self, field, delta):
+        return self.update(**{field: Greatest(F(field) + delta, 0)})
+
+    def search(self, query):
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(query, config='russian')
+            return self.annotate(search_rank=Cast(
+                SearchRank(F('search_vector'), query), models.FloatField()
+            )).filter(search_vector=query)
+        terms = ' '.join(
+            '"{0}"*'.format(term.replace('"', '""'))
+            for term in query.split()
+        )
+        return self.annotate(search_rank=RawSQL(
+            'SELECT -bm25(recipes_recipe_fts, 10.0, 1.0) '
+            'FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s '
+            'AND recipes_recipe_fts.rowid = recipes_recipe.id',
+            (terms, ),
+            output_field=models.FloatField()
+        )).filter(search_rank__isnull=False)
+
+    def with_coverage(self, ingredient_ids):
+        def count_ingredients(**filters):
+            return Subquery(RecipeIngredient.objects.filter(
+                recipe=OuterRef('pk'), **filters
+            ).order_by().values('recipe').annotate(
+                count=Count('id')
+            ).values('count'), output_field=models.IntegerField())
+
+        return self.filter(
+            pk__in=RecipeIngredient.objects.filter(
+                ingredient_id__in=ingredient_ids).values('recipe_id')
+        ).annotate(
+            matched_count=count_ingredients(ingredient_id__in=ingredient_ids),
+            ingredients_count=count_ingredients(),
+        ).annotate(
+            missing_count=ExpressionWrapper(
+                F('ingredients_count') - F('matched_count'),
+                output_field=models.IntegerField()
+            )
+        )
+
+    def for_read(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_to_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -56,17 +120,22 @@ class Recipe(models.Model):
     )
     ingredients = models.ManyToManyField(
         Ingredient,
+        through='RecipeIngredient',
         related_name='recipes',
         verbose_name='Ингредиенты'
     )
     tags = models.ManyToManyField(
         Tag,
+        through='RecipeTag',
         related_name='recipes',
         verbose_name='Теги'
     )
     image = models.ImageField(
         'Картинка',
         blank=True,
+        db_index=True,
+        upload_to='recipes/',
+        storage=recipe_image_storage,
     )
     text = models.TextField(verbose_name='Описание')
     cooking_time = models.IntegerField(
@@ -74,11 +143,40 @@ class Recipe(models.Model):
         verbose_name='Время готовки'
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В корзинах'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        verbose_name='Рейтинг за последнее время'
+    )
+    has_thumbnails = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Превью созданы'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['id']
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+            models.Index(fields=['-favorites_count', '-id'],
+                         name='recipe_favorites_count_idx'),
+            models.Index(fields=['-trending_score', '-id'],
+                         name='recipe_trending_score_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -98,6 +196,11 @@ class Favorite(models.Model):
         related_name='recipe_favorites',
         null=True
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Добавлено'
+    )
 
     class Meta:
         verbose_name = 'Изранное'
@@ -126,6 +229,11 @@ class ShoppingCart(models.Model):
         null=True,
         related_name='recipe_shoppingcart'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Добавлено'
+    )
 
     class Meta:
         verbose_name = 'Корзина'
@@ -162,6 +270,10 @@ class RecipeTag(models.Model):
             models.UniqueConstraint(fields=['recipe', 'tag'],
                                     name='recipe_tag_unique')
         ]
+        indexes = [
+            models.Index(fields=['tag', 'recipe'],
+                         name='recipetag_tag_recipe_idx'),
+        ]
 
     def __str__(self):
         return self.recipe
@@ -198,3 +310,83 @@ class RecipeIngredient(models.Model):
 
     def __str__(self):
         return self.recipe
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'],
+                                    name='feed_entry_unique')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-recipe'],
+                         name='feedentry_user_pub_date_idx'),
+        ]
+
+
+class FeedInbox(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_inbox',
+        verbose_name='Читатель'
+    )
+    horizon = models.DateTimeField(
+        null=True,
+        verbose_name='Граница полноты ленты'
+    )
+
+    class Meta:
+        verbose_name = 'Лента подписок'
+        verbose_name_plural = 'Ленты подписок'
+
+
+class RecipeSimilarity(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'similar'],
+                                    name='recipe_similarity_unique')
+        ]
+        indexes = [
+            models.Index(fields=['recipe', '-score'],
+                         name='recipesimilarity_score_idx'),
+        ]
@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Recipe
+from .storage import lock_file, recipe_image_storage
+
+
+def delete_orphan_image(name):
+    if not name:
+        return
+    with transaction.atomic():
+        lock_file(name)
+        if not Recipe.objects.filter(image=name).exists():
+            recipe_image_storage.delete_with_derivatives(name)
+
+
+def schedule_orphan_check(name):
+    transaction.on_commit(lambda: delete_orphan_image(name))
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_old_image(sender, instance, **kwargs):
+    instance._old_image = None
+    if instance.pk:
+        instance._old_image = Recipe.objects.filter(
+            pk=instance.pk).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_image(sender, instance, created, **kwargs):
+    old_image = getattr(instance, '_old_image', None)
+    if old_image and old_image != instance.image.name:
+        schedule_orphan_check(old_image)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_image(sender, instance, **kwargs):
+    schedule_orphan_check(instance.image.name)
@@ -0,0 +1,52 @@
+import heapq
+from collections import Counter, defaultdict
+
+
+def build_features(ingredient_rows, tag_rows):
+    ingredients = defaultdict(set)
+    tags = defaultdict(set)
+    for recipe_id, ingredient_id in ingredient_rows:
+        ingredients[recipe_id].add(ingredient_id)
+    for recipe_id, tag_id in tag_rows:
+        tags[recipe_id].add(tag_id)
+    return {
+        recipe_id: (frozenset(ingredients[recipe_id]),
+                    frozenset(tags.get(recipe_id, ())))
+        for recipe_id in ingredients
+    }
+
+
+def build_postings(features, max_posting):
+    postings = defaultdict(list)
+    for recipe_id, (ingredients, _) in features.items():
+        for ingredient_id in ingredients:
+            postings[ingredient_id].append(recipe_id)
+    return {
+        ingredient_id: recipe_ids
+        for ingredient_id, recipe_ids in postings.items()
+        if len(recipe_ids) <= max_posting
+    }
+
+
+def jaccard(features, first, second):
+    first_ingredients, first_tags = features[first]
+    second_ingredients, second_tags = features[second]
+    shared = (len(first_ingredients & second_ingredients) +
+              len(first_tags & second_tags))
+    total = (len(first_ingredients) + len(first_tags) +
+             len(second_ingredients) + len(second_tags) - shared)
+    return shared / total if total else 0.0
+
+
+def top_neighbors(features, k, max_posting, max_candidates):
+    postings = build_postings(features, max_posting)
+    for recipe_id, (ingredients, _) in features.items():
+        overlaps = Counter()
+        for ingredient_id in ingredients:
+            overlaps.update(postings.get(ingredient_id, ()))
+        overlaps.pop(recipe_id, None)
+        candidates = overlaps.most_common(max_candidates)
+        yield recipe_id, heapq.nlargest(k, (
+            (jaccard(features, recipe_id, other_id), other_id)
+            for other_id, _ in candidates
+        ))
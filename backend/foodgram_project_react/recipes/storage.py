@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils.deconstruct import deconstructible
+
+
+def lock_file(name):
+    if connection.vendor != 'postgresql' or not connection.in_atomic_block:
+        return
+    key = int.from_bytes(
+        hashlib.sha256(name.encode()).digest()[:8], 'big', signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], digest + ext)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        lock_file(name)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_derivative(self, name, content):
+        return super().save(name, content)
+
+    def delete_with_derivatives(self, name):
+        self.delete(name)
+        stem = os.path.splitext(name)[0]
+        directory = os.path.dirname(os.path.join('thumbs', stem))
+        prefix = os.path.basename(stem) + '_'
+        try:
+            _, files = self.listdir(directory)
+        except FileNotFoundError:
+            return
+        for file_name in files:
+            if file_name.startswith(prefix):
+                self.delete(os.path.join(directory, file_name))
+
+
+recipe_image_storage = ContentAddressedStorage()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Subscription, User
+from .models import Subscription, User, UserStats
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -17,6 +17,14 @@ class SubscriptionsAdmin(admin.ModelAdmin):
     )
 
 
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'recipes_count', 'subscribers_count',
+    )
+    readonly_fields = ('recipes_count', 'subscribers_count')
+
+
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
 admin.site.register(Subscription, SubscriptionsAdmin)
+admin.site.register(UserStats, UserStatsAdmin)
@@ -0,0 +1,57 @@
+import base64
+import hashlib
+from collections import OrderedDict
+
+from django.contrib.auth.hashers import BasePasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    algorithm = 'scrypt'
+    work_factor = 2 ** 14
+    block_size = 8
+    parallelism = 1
+    maxmem = 64 * 1024 * 1024
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=self.maxmem, dklen=64
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash_}'
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash_ = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+        return int(n), salt, int(r), int(p), hash_
+
+    def verify(self, password, encoded):
+        n, salt, r, p, _ = self.decode(encoded)
+        return constant_time_compare(
+            encoded, self.encode(password, salt, n, r, p))
+
+    def safe_summary(self, encoded):
+        n, salt, r, p, hash_ = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), self.algorithm),
+            (_('work factor'), n),
+            (_('block size'), r),
+            (_('parallelism'), p),
+            (_('salt'), mask_hash(salt)),
+            (_('hash'), mask_hash(hash_)),
+        ])
+
+    def must_update(self, encoded):
+        n, salt, r, p, hash_ = self.decode(encoded)
+        return (n, r, p) != (
+            self.work_factor, self.block_size, self.parallelism)
+
+    def harden_runtime(self, password, encoded):
+        pass
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0006_auto_20220422_1708'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='Subscriptions',
+            new_name='Subscription',
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('author', 'subscriber'), name='subscription_unique'),
+        ),
+        migrations.DeleteModel(
+            name='User',
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_subscriptions_count(apps, schema_editor):
+    UserStats = apps.get_model('users', 'UserStats')
+    Subscription = apps.get_model('users', 'Subscription')
+    UserStats.objects.update(subscriptions_count=Coalesce(Subquery(
+        Subscription.objects.filter(subscriber=OuterRef('user_id')).order_by(
+        ).values('subscriber').annotate(total=Count('pk')).values('total'),
+        output_field=models.IntegerField()
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_userstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='subscriptions_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество подписок'),
+        ),
+        migrations.RunPython(fill_subscriptions_count, migrations.RunPython.noop),
+    ]
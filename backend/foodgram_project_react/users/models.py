@@ -1,5 +1,8 @@
+from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 
 User = get_user_model()
 
@@ -27,3 +30,47 @@ class Subscription(models.Model):
 
     def __str__(self):
         return self.author.username
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество рецептов'
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+    subscriptions_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок'
+    )
+
+    class Meta:
+        verbose_name = 'счётчики пользователя'
+        verbose_name_plural = 'счётчики пользователей'
+
+    def __str__(self):
+        return self.user.username
+
+    @classmethod
+    def change_counter(cls, user_id, field, delta):
+        updated = cls.objects.filter(user_id=user_id).update(
+            **{field: Greatest(F(field) + delta, 0)})
+        if not updated:
+            Recipe = apps.get_model('recipes', 'Recipe')
+            cls.objects.get_or_create(user_id=user_id, defaults={
+                'recipes_count': Recipe.objects.filter(
+                    author_id=user_id).count(),
+                'subscribers_count': Subscription.objects.filter(
+                    author_id=user_id).count(),
+                'subscriptions_count': Subscription.objects.filter(
+                    subscriber_id=user_id).count(),
+            })